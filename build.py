@@ -4,12 +4,27 @@ Skrip build untuk membuat executable Windows
 
 import os
 import sys
-import subprocess
 import shutil
+import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
+# Model kecil yang boleh dibundel untuk penggunaan offline
+DEFAULT_MODEL_FILE = "yolov8n.pt"
 
-def build():
-    """Build executable Windows menggunakan PyInstaller"""
+# Hash seed tetap agar urutan hasil analisis PyInstaller reproducible. Seed hanya
+# berlaku saat interpreter dimulai, jadi jalankan: PYTHONHASHSEED=0 python build.py
+REPRODUCIBLE_HASH_SEED = "0"
+
+
+def build(include_default_model: bool = False, clean: bool = False):
+    """
+    Build executable Windows menggunakan PyInstaller
+    
+    Args:
+        include_default_model: Bundel model default (yolov8n.pt) ke dalam hasil build
+        clean: Hapus cache build/ PyInstaller sebelum build (build penuh)
+    """
     
     # Project paths
     project_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,74 +32,131 @@ def build():
     dist_dir = os.path.join(project_dir, "dist")
     build_dir = os.path.join(project_dir, "build")
     
-    # Bersihkan build sebelumnya
-    if os.path.exists(dist_dir):
-        shutil.rmtree(dist_dir)
-    if os.path.exists(build_dir):
-        shutil.rmtree(build_dir)
-        
-    # Periksa apakah PyInstaller tersedia
-    try:
-        subprocess.run([sys.executable, "-m", "PyInstaller", "--version"], capture_output=True, check=True)
-    except subprocess.CalledProcessError:
-        print("Error: PyInstaller is not installed. Run 'pip install pyinstaller' first.")
-        sys.exit(1)
+    exe_path = os.path.join(dist_dir, "HumanDetectionApp", "HumanDetectionApp.exe")
+    stamp_path = os.path.join(build_dir, "build.hash")
+    spec_path = os.path.join(project_dir, "HumanDetectionApp.spec")
+    spec_hash_path = spec_path + ".hash"
     
-    # Konstruksi perintah PyInstaller
+    # Periksa PyInstaller dan pindai mtime src/ di thread latar belakang
+    # selagi perintah disusun
+    probe_pool = ThreadPoolExecutor(max_workers=2)
+    pyinstaller_probe = probe_pool.submit(_pyinstaller_available)
+    src_mtime_probe = probe_pool.submit(_newest_mtime, src_dir)
+    probe_pool.shutdown(wait=False)
+    
+    # Opsi spec PyInstaller (disimpan ke HumanDetectionApp.spec)
     cmd = [
-        sys.executable, "-m", "PyInstaller",
         "--name=HumanDetectionApp",
-        "--onefile",
+        # onedir: file ditaruh di samping exe, tidak diekstrak ke %TEMP% setiap start
+        "--onedir",
+        "--contents-directory=_internal",
         "--windowed",
-        "--noconfirm",
+        # UPX memperlambat build & start, dan sering merusak DLL torch
+        "--noupx",
+        # Simpan .pyc sebagai file biasa (bukan di arsip PYZ) agar bisa di-cache OS
+        "--noarchive",
         # Impor tersembunyi untuk ultralytics dan torch
         "--hidden-import=ultralytics",
         "--hidden-import=torch",
         "--hidden-import=cv2",
         "--hidden-import=numpy",
         "--hidden-import=PIL",
-        # Kumpulkan file data ultralytics
-        "--collect-data=ultralytics",
+        # Buang modul berat yang tidak pernah dipakai aplikasi GUI ini
+        "--exclude-module=tkinter",
+        "--exclude-module=_tkinter",
+        "--exclude-module=IPython",
+        "--exclude-module=notebook",
+        "--exclude-module=jupyter_client",
+        "--exclude-module=pytest",
+        "--exclude-module=tensorboard",
+        "--exclude-module=torch.utils.tensorboard",
+        # Kumpulkan hanya file konfigurasi ultralytics (default.yaml dibaca saat
+        # impor); aset, contoh, dan dokumen lain tidak dipakai saat inferensi
+        "--collect-data=ultralytics.cfg",
         # Tambahkan direktori sumber ke path
         f"--paths={src_dir}",
     ]
     
-    # Tambahkan file model YOLO jika ada (hanya nano dan small untuk ukuran)
-    model_files = [
-        "yolov8n.pt", "yolov8s.pt",
-        "yolo11n.pt", "yolo11s.pt", 
-        "yolo12n.pt", "yolo12s.pt"
-    ]
-    
+    # Model YOLO tidak dibundel secara default — aplikasi mengunduhnya ke cache
+    # pengguna saat pertama kali dipakai. Bundel hanya model default jika diminta
+    # (untuk penggunaan offline).
     included_models = []
-    for model_file in model_files:
-        model_path = os.path.join(project_dir, model_file)
+    if include_default_model:
+        model_path = os.path.join(project_dir, DEFAULT_MODEL_FILE)
         if os.path.exists(model_path):
             # Tambahkan model ke data yang dibundel (sumber;tujuan)
             cmd.append(f"--add-data={model_path};.")
-            included_models.append(model_file)
-            print(f"Including model: {model_file}")
-    
-    # Titik masuk (harus yang terakhir)
-    cmd.append(os.path.join(src_dir, "main.py"))
+            included_models.append(DEFAULT_MODEL_FILE)
+            print(f"Including model: {DEFAULT_MODEL_FILE}")
+        else:
+            print(f"Warning: {DEFAULT_MODEL_FILE} not found, building without bundled model")
     
     # Tambahkan ikon jika ada
     icon_path = os.path.join(project_dir, "assets", "icon.ico")
     if os.path.exists(icon_path):
-        cmd.insert(-1, f"--icon={icon_path}")
+        cmd.append(f"--icon={icon_path}")
+    
+    # Titik masuk (harus yang terakhir)
+    cmd.append(os.path.join(src_dir, "main.py"))
+    
+    # Periksa apakah PyInstaller tersedia (di proses ini, tanpa interpreter kedua)
+    if not pyinstaller_probe.result():
+        print("Error: PyInstaller is not installed. Run 'pip install pyinstaller' first.")
+        sys.exit(1)
+    
+    # Lewati build jika perintah sama dan exe lebih baru dari semua input
+    cmd_hash = hashlib.blake2b("\0".join(cmd).encode("utf-8"), digest_size=16).hexdigest()
+    if not clean and _is_up_to_date(exe_path, stamp_path, cmd_hash, project_dir, src_mtime_probe.result()):
+        print("Build is up to date, nothing to do (use --clean to force a rebuild).")
+        print(f"Executable: {exe_path}")
+        return
+    
+    # Bersihkan output sebelumnya. Folder build/ berisi cache analisis
+    # PyInstaller dan hanya dihapus jika diminta (--clean) agar build ulang cepat.
+    if os.path.exists(dist_dir):
+        shutil.rmtree(dist_dir)
+    if clean and os.path.exists(build_dir):
+        shutil.rmtree(build_dir)
+    
+    # Buat ulang file spec hanya jika opsi berubah, agar cache analisis
+    # PyInstaller di build/ tetap valid
+    if not _spec_is_current(spec_path, spec_hash_path, cmd_hash):
+        print("Generating spec file...")
+        spec_args = [f"--specpath={project_dir}"] + cmd
+        print(f"Options: {' '.join(spec_args)}")
+        if _run_makespec(spec_args, project_dir) != 0:
+            print("Error: Failed to generate spec file.")
+            sys.exit(1)
+        with open(spec_hash_path, "w", encoding="utf-8") as f:
+            f.write(cmd_hash)
     
     print("Building executable...")
-    print(f"Command: {' '.join(cmd)}")
     
-    # Jalankan PyInstaller
-    result = subprocess.run(cmd, cwd=project_dir)
+    # Analisis utama berjalan di interpreter ini, jadi seed harus diatur sebelum
+    # Python dimulai; di sini hanya diteruskan ke subprocess hook PyInstaller
+    if sys.flags.hash_randomization:
+        print(f"Note: hash randomization is on; set PYTHONHASHSEED={REPRODUCIBLE_HASH_SEED} "
+              "before running build.py for a reproducible build.")
+    os.environ["PYTHONHASHSEED"] = REPRODUCIBLE_HASH_SEED
+    
+    # Jalankan PyInstaller di proses ini (tanpa startup interpreter kedua)
+    returncode = _run_pyinstaller(
+        [spec_path, "--noconfirm", f"--workpath={build_dir}", f"--distpath={dist_dir}"],
+        project_dir
+    )
     
-    if result.returncode == 0:
+    if returncode == 0:
+        os.makedirs(build_dir, exist_ok=True)
+        with open(stamp_path, "w", encoding="utf-8") as f:
+            f.write(cmd_hash)
+        
         print("\n" + "="*50)
         print("BUILD SUCCESSFUL!")
         print("="*50)
-        print(f"\nExecutable created at: {os.path.join(dist_dir, 'HumanDetectionApp.exe')}")
-        print("\nNote: The first run may take longer as it downloads the YOLO model.")
+        print(f"\nExecutable created at: {exe_path}")
+        print("Distribute the whole 'dist/HumanDetectionApp' folder, not just the .exe.")
+        if not included_models:
+            print("\nNote: The first run may take longer as it downloads the YOLO model.")
     else:
         print("\n" + "="*50)
         print("BUILD FAILED!")
@@ -92,5 +164,141 @@ def build():
         sys.exit(1)
 
 
+def _pyinstaller_available() -> bool:
+    """Periksa apakah PyInstaller dapat diimpor"""
+    try:
+        import PyInstaller  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _spec_is_current(spec_path: str, spec_hash_path: str, cmd_hash: str) -> bool:
+    """Periksa apakah file spec dibuat dari opsi yang sama"""
+    if not os.path.exists(spec_path) or not os.path.exists(spec_hash_path):
+        return False
+    with open(spec_hash_path, "r", encoding="utf-8") as f:
+        return f.read().strip() == cmd_hash
+
+
+def _run_makespec(args: list, cwd: str) -> int:
+    """
+    Buat file spec secara in-process (setara pyi-makespec).
+    
+    Args:
+        args: Opsi makespec diikuti skrip titik masuk
+        cwd: Direktori kerja selama pembuatan spec
+        
+    Returns:
+        Kode keluar makespec (0 = sukses)
+    """
+    from PyInstaller.utils.cliutils import makespec
+    
+    # makespec.run() membaca argumen dari sys.argv
+    previous_argv = sys.argv
+    previous_cwd = os.getcwd()
+    sys.argv = ["pyi-makespec"] + args
+    os.chdir(cwd)
+    try:
+        makespec.run()
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    finally:
+        sys.argv = previous_argv
+        os.chdir(previous_cwd)
+
+
+def _run_pyinstaller(args: list, cwd: str) -> int:
+    """
+    Jalankan PyInstaller secara in-process.
+    
+    Args:
+        args: Argumen PyInstaller (file spec dan opsi build)
+        cwd: Direktori kerja selama build
+        
+    Returns:
+        Kode keluar PyInstaller (0 = sukses)
+    """
+    import PyInstaller.__main__
+    
+    previous_cwd = os.getcwd()
+    os.chdir(cwd)
+    try:
+        PyInstaller.__main__.run(args)
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    finally:
+        os.chdir(previous_cwd)
+
+
+def _is_up_to_date(exe_path: str, stamp_path: str, cmd_hash: str,
+                   project_dir: str, newest_src_mtime: float) -> bool:
+    """
+    Periksa apakah hasil build masih valid.
+    Valid jika hash perintah sama dengan build terakhir dan exe lebih baru
+    dari build.py, requirements.txt, dan semua file di src/.
+    
+    Args:
+        newest_src_mtime: mtime terbaru di src/ (dari _newest_mtime)
+    """
+    if not os.path.exists(exe_path) or not os.path.exists(stamp_path):
+        return False
+    
+    with open(stamp_path, "r", encoding="utf-8") as f:
+        if f.read().strip() != cmd_hash:
+            return False
+    
+    exe_mtime = os.path.getmtime(exe_path)
+    
+    # Satu enumerasi direktori untuk file di root proyek
+    root_inputs = {"build.py", "requirements.txt"}
+    with os.scandir(project_dir) as entries:
+        for entry in entries:
+            if entry.name in root_inputs and entry.stat().st_mtime > exe_mtime:
+                return False
+    
+    return newest_src_mtime <= exe_mtime
+
+
+def _newest_mtime(directory: str) -> float:
+    """
+    Cari mtime terbaru dari semua file di bawah direktori (rekursif).
+    Memakai os.scandir: di Windows, DirEntry.stat() memakai data dari
+    enumerasi direktori tanpa syscall tambahan per file.
+    """
+    newest = 0.0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != "__pycache__":
+                    newest = max(newest, _newest_mtime(entry.path))
+            elif entry.is_file():
+                newest = max(newest, entry.stat().st_mtime)
+    return newest
+
+
+def parse_args():
+    """Parse argumen baris perintah build"""
+    parser = argparse.ArgumentParser(description="Build HumanDetectionApp executable")
+    parser.add_argument(
+        "--include-default-model",
+        action="store_true",
+        help=f"Bundle {DEFAULT_MODEL_FILE} for offline use (other models are downloaded on first use)"
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Remove PyInstaller's build/ cache and force a full rebuild"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    build()
+    args = parse_args()
+    build(include_default_model=args.include_default_model, clean=args.clean)
@@ -1,28 +1,29 @@
 """
 Skrip untuk menjalankan aplikasi dalam mode development
-Membutuhkan Python 3.11
+Membutuhkan Python 3.11 atau lebih baru
 """
 
 import sys
 import os
 
-# Periksa versi Python
-if sys.version_info[:2] != (3, 11):
-    print("=" * 50)
-    print("ERROR: Python 3.11 is required!")
-    print(f"Current version: {sys.version_info.major}.{sys.version_info.minor}")
-    print("\nPlease set up the environment:")
-    print("  py -3.11 -m venv venv311")
-    print("  .\\venv311\\Scripts\\activate")
-    print("  pip install -r requirements.txt")
-    print("=" * 50)
-    sys.exit(1)
+# Direktori src ditambahkan ke path Python agar impor berfungsi dengan benar
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
+sys.path.insert(0, SRC_DIR)
 
-# Tambahkan direktori src ke path Python agar impor berfungsi dengan benar
-src_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src")
-sys.path.insert(0, src_dir)
-
-from main import main
+# Periksa versi Python (dilewati pada exe PyInstaller atau jika SKIP_PY_CHECK=1)
+if not getattr(sys, "frozen", False) and os.environ.get("SKIP_PY_CHECK") != "1":
+    if sys.version_info < (3, 11):
+        print("=" * 50)
+        print("ERROR: Python 3.11 or newer is required!")
+        print(f"Current version: {sys.version_info.major}.{sys.version_info.minor}")
+        print("\nPlease set up the environment:")
+        print("  py -3.11 -m venv venv311")
+        print("  .\\venv311\\Scripts\\activate")
+        print("  pip install -r requirements.txt")
+        print("=" * 50)
+        sys.exit(1)
 
 if __name__ == "__main__":
+    # Impor di sini agar run.py murah diimpor oleh tooling (main menarik Qt, torch, cv2)
+    from main import main
     main()
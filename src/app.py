@@ -8,7 +8,7 @@ import os
 import time
 import traceback
 import numpy as np
-from collections import deque
+from typing import Optional
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QComboBox, QPushButton, QLabel, QFrame,
@@ -18,14 +18,26 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
 
-from services import CameraService, VideoService, DetectorService, RecordingService
+from services import (
+    CameraService, VideoService, DetectorService, RecordingService, InferenceService
+)
 from widgets import VideoWidget, StatsWidget
 from utils.constants import (
     WINDOW_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT, YOLO_MODELS,
-    DEFAULT_CAPTURE_FPS, MIN_FPS, MAX_FPS
+    COMPACT_LAYOUT_WIDTH, COMPACT_LAYOUT_HYSTERESIS, COMPACT_LAYOUT_DEBOUNCE_MS,
+    DEFAULT_CAPTURE_FPS, MIN_FPS, MAX_FPS, DISPLAY_FPS, SIMILARITY_SKIP_DEFAULT, ModelKind
 )
 from utils import styles
 
+# Jendela rata-rata FPS deteksi (jumlah interval) dan jeda pembaruan label
+FPS_WINDOW = 30
+FPS_UPDATE_INTERVAL_NS = 250_000_000
+
+# Pakai GPU (CUDA/TensorRT) jika tersedia; DetectorService kembali ke CPU sendiri.
+# APP_FORCE_CPU=1 memaksa CPU untuk debugging. torch tidak diimpor di sini
+# agar startup tetap cepat — ketersediaan CUDA diperiksa saat model dimuat.
+_USE_GPU = os.environ.get("APP_FORCE_CPU") != "1"
+
 
 # =============================================================================
 # Background Threads
@@ -45,10 +57,12 @@ class ModelLoaderThread(QThread):
     def run(self):
         """Muat model di thread terpisah."""
         try:
-            self.detector_service = DetectorService(self._model_name, use_gpu=False)
+            self.detector_service = DetectorService(self._model_name, use_gpu=_USE_GPU)
             if self.detector_service.init_error:
                 self.model_loaded.emit(False, self._model_name, self.detector_service.init_error)
             else:
+                # Pemanasan di thread ini agar klik Start pertama tidak tersendat
+                self.detector_service.warmup()
                 self.model_loaded.emit(True, self._model_name, "")
         except Exception as e:
             self.model_loaded.emit(False, self._model_name, str(e))
@@ -170,6 +184,17 @@ class SettingsDialog(QDialog):
         skip_row.addStretch()
         det_layout.addLayout(skip_row)
         
+        # Similarity skip
+        self._similarity_cb = QCheckBox("Skip unchanged frames (static scenes)")
+        self._similarity_cb.setToolTip(
+            "Reuse the last detections while the frame barely changes.\n"
+            "Detection still runs at least once per second."
+        )
+        self._similarity_cb.setChecked(
+            self._detector_service.get_similarity_skip() if self._detector_service else SIMILARITY_SKIP_DEFAULT
+        )
+        det_layout.addWidget(self._similarity_cb)
+        
         layout.addWidget(det_group)
         
         # === Display Group ===
@@ -241,6 +266,7 @@ class SettingsDialog(QDialog):
         self._fps_slider.setValue(15)
         self._scale_combo.setCurrentIndex(2)  # Half (0.5x)
         self._skip_spin.setValue(2)
+        self._similarity_cb.setChecked(True)
         self._fast_scaling_cb.setChecked(True)
         self._apply_settings()
     
@@ -249,6 +275,7 @@ class SettingsDialog(QDialog):
         self._fps_slider.setValue(DEFAULT_CAPTURE_FPS)
         self._scale_combo.setCurrentIndex(0)  # Full (1.0x)
         self._skip_spin.setValue(1)
+        self._similarity_cb.setChecked(SIMILARITY_SKIP_DEFAULT)
         self._fast_scaling_cb.setChecked(True)
         self._apply_settings()
     
@@ -257,6 +284,7 @@ class SettingsDialog(QDialog):
         fps = self._fps_slider.value()
         scale = self._scale_combo.currentData()
         skip = self._skip_spin.value()
+        similarity_skip = self._similarity_cb.isChecked()
         fast_scaling = self._fast_scaling_cb.isChecked()
         
         if self._video_service:
@@ -265,6 +293,7 @@ class SettingsDialog(QDialog):
         if self._detector_service:
             self._detector_service.set_inference_scale(scale)
             self._detector_service.set_skip_frames(skip)
+            self._detector_service.set_similarity_skip(similarity_skip)
         
         if self._video_widget:
             self._video_widget.set_fast_scaling(fast_scaling)
@@ -282,6 +311,11 @@ class SettingsDialog(QDialog):
 class MainWindow(QMainWindow):
     """Aplikasi utama dengan pratinjau kamera, deteksi AI, dan perekaman."""
     
+    # Hasil penulisan screenshot dari thread latar belakang: (path, error)
+    screenshot_saved = pyqtSignal(str, str)
+    # Encoder perekaman gagal di tengah jalan (dari thread encoder): error
+    recording_failed = pyqtSignal(str)
+    
     def __init__(self):
         super().__init__()
         
@@ -291,6 +325,9 @@ class MainWindow(QMainWindow):
         self._recording_service = RecordingService()
         self._detector_service = None
         
+        # Deteksi berjalan di thread sendiri; hanya frame terbaru yang diproses
+        self._inference_service = InferenceService(self)
+        
         # Thread latar belakang (simpan referensi agar tidak di-garbage-collect)
         self._model_loader_thread = None
         self._camera_scan_thread = None
@@ -299,8 +336,10 @@ class MainWindow(QMainWindow):
         self._is_running = False
         self._is_previewing = False
         self._is_loading_model = False
+        self._start_after_load = False  # Start diklik sebelum model siap
         self._current_camera = 0
         self._compact_mode = False
+        self._pending_camera_restart = None  # dipanggil saat VideoService.released
         
         # Processing mode state
         self._processing_mode = 'streaming'  # 'streaming' atau 'low-specs'
@@ -312,22 +351,52 @@ class MainWindow(QMainWindow):
         self._lowspec_timer.setSingleShot(True)
         self._lowspec_timer.timeout.connect(self._lowspec_mark_ready)
         
+        # Loop tampilan: ambil frame terbaru pada laju tetap, bukan tiap frame kamera.
+        # Aktif hanya selama thread kamera berjalan.
+        self._display_timer = QTimer(self)
+        self._display_timer.setInterval(1000 // DISPLAY_FPS)
+        self._display_timer.timeout.connect(self._on_display_tick)
+        
+        # Debounce peralihan tata letak kompak saat jendela diubah ukurannya
+        self._compact_timer = QTimer(self)
+        self._compact_timer.setSingleShot(True)
+        self._compact_timer.setInterval(COMPACT_LAYOUT_DEBOUNCE_MS)
+        self._compact_timer.timeout.connect(self._apply_compact_mode)
+        
         # FPS tracking (measures actual detection rate)
-        self._frame_times = deque(maxlen=30)
-        self._last_frame_time = 0
-        self._last_fps_update = 0
+        # Ring buffer interval (nanodetik, int) dengan jumlah berjalan yang eksak
+        self._frame_times = [0] * FPS_WINDOW
+        self._frame_times_idx = 0
+        self._frame_times_count = 0
+        self._frame_times_sum = 0
+        self._last_frame_time = 0       # perf_counter_ns
+        self._last_fps_update = 0       # perf_counter_ns
         
         # Detection throttling: video streams at camera rate,
-        # YOLO runs at target FPS, cached boxes redrawn on other frames
-        self._last_detection_time = 0.0
+        # YOLO runs at target FPS (frames go straight from the capture
+        # thread to the inference thread), latest cached boxes are
+        # redrawn on every displayed frame
         self._cached_detections = []    # Last YOLO results for redraw
         self._cached_person_count = 0
+        self._last_fps_value = 0.0
+        
+        # Buffer tampilan yang dipakai ulang untuk frame beranotasi (lihat _on_frame_ready)
+        self._display_buf: Optional[np.ndarray] = None
+        
+        # Statistik hanya diperbarui saat panel terlihat dan nilainya berubah
+        self._stats_visible = True
+        self._shown_person_count = -1
         
         # Inisiasi UI, hubungkan sinyal, pindai kamera, dan load model AI
         self._init_ui()
         self._connect_signals()
-        self._refresh_cameras()
-        QTimer.singleShot(500, self._preload_model)
+        self._inference_service.start_service()
+        
+        # Muat model dan pindai kamera segera setelah event loop berjalan, agar
+        # jendela tampil lebih dulu; keduanya berjalan di thread latar belakang.
+        # Model dimulai lebih dulu karena pemuatannya paling lama.
+        QTimer.singleShot(0, self._preload_model)
+        QTimer.singleShot(0, self._refresh_cameras)
     
     def _init_ui(self):
         """Tata letak window utama."""
@@ -369,6 +438,8 @@ class MainWindow(QMainWindow):
         
         # Pemisahan default: 75% video, 25% statistik
         splitter.setSizes([750, 250])
+        splitter.splitterMoved.connect(self._on_splitter_moved)
+        self._splitter = splitter
         main_layout.addWidget(splitter)
         
         # Status bar bawah
@@ -474,7 +545,7 @@ class MainWindow(QMainWindow):
         
         # Isi dengan model YOLO yang tersedia
         for model_name, info in YOLO_MODELS.items():
-            self._model_combo.addItem(model_name)
+            self._model_combo.addItem(model_name, info['kind'])
             self._model_combo.setItemData(
                 self._model_combo.count() - 1, 
                 info['description'], 
@@ -513,6 +584,11 @@ class MainWindow(QMainWindow):
         self._folder_btn.setStyleSheet(styles.get_icon_button_style("#4a4a6a", "#5a5a7a"))
         self._folder_btn.setContextMenuPolicy(Qt.CustomContextMenu)
         self._update_folder_tooltip()
+        
+        # Menu klik kanan dibuat sekali (stylesheet diparse sekali, bukan per klik)
+        self._folder_menu = QMenu(self)
+        self._folder_menu.setStyleSheet(styles.get_context_menu_style())
+        self._folder_select_action = self._folder_menu.addAction("📁 Pilih folder output...")
         parent_layout.addWidget(self._folder_btn)
         
         # Tombol screenshot
@@ -547,11 +623,22 @@ class MainWindow(QMainWindow):
         self._folder_btn.clicked.connect(self._on_folder_open)
         self._folder_btn.customContextMenuRequested.connect(self._on_folder_select)
         self._capture_btn.clicked.connect(self._on_capture)
+        self.screenshot_saved.connect(self._on_screenshot_saved)
+        self.recording_failed.connect(self._on_recording_failed)
         self._record_btn.clicked.connect(self._on_record_toggle)
         
         # Callback penangkapan video
-        self._video_service.frame_ready.connect(self._on_frame_ready)
+        self._video_service.capture_started.connect(self._display_timer.start)
+        self._video_service.finished.connect(self._display_timer.stop)
         self._video_service.error_occurred.connect(self._on_video_error)
+        # Antre: restart berjalan setelah stop selesai dan event tertunda diproses
+        self._video_service.released.connect(self._on_camera_released, Qt.QueuedConnection)
+        
+        # Frame langsung dari thread kamera ke thread inferensi (tanpa antre di GUI)
+        self._video_service.frame_ready.connect(self._inference_service.on_frame, Qt.DirectConnection)
+        
+        # Hasil deteksi dari thread inferensi
+        self._inference_service.detection_ready.connect(self._on_detection_ready)
     
     # =========================================================================
     # Pemindaian Kamera (non-blocking via thread)
@@ -613,16 +700,24 @@ class MainWindow(QMainWindow):
                 was_detecting = self._is_running
                 if self._is_running:
                     self._on_stop()
-                elif self._is_previewing:
-                    self._stop_preview()
                 
                 self._current_camera = camera_index
+                restart = self._on_start if was_detecting else self._start_preview
                 
-                # Restart in same mode after brief delay
-                if was_detecting:
-                    QTimer.singleShot(200, lambda: self._on_start())
+                # Mulai ulang setelah kamera lama benar-benar dilepaskan (sinyal
+                # released), bukan setelah jeda tebakan
+                if self._is_previewing:
+                    self._pending_camera_restart = restart
+                    self._stop_preview()
                 else:
-                    QTimer.singleShot(200, self._start_preview)
+                    restart()
+    
+    def _on_camera_released(self):
+        """Jalankan restart kamera yang tertunda setelah kamera lama dilepaskan."""
+        restart = self._pending_camera_restart
+        self._pending_camera_restart = None
+        if restart is not None:
+            restart()
     
     # =========================================================================
     # Pemuatan Model (non-blocking via thread)
@@ -630,10 +725,12 @@ class MainWindow(QMainWindow):
     
     def _on_model_changed(self, model_name: str):
         """Ganti model AI. Peringatkan pengguna jika memilih varian yang lebih berat."""
-        model_lower = model_name.lower()
-        is_heavy = '- balanced' in model_lower or 's -' in model_lower
+        is_heavy = self._model_combo.currentData() == ModelKind.SMALL
+        
+        # Peringatan hanya relevan untuk CPU; di GPU model "s" tetap real-time
+        on_gpu = self._detector_service is not None and self._detector_service.device != "cpu"
         
-        if is_heavy:
+        if is_heavy and not on_gpu:
             QMessageBox.warning(
                 self,
                 "Peringatan Performance",
@@ -671,9 +768,22 @@ class MainWindow(QMainWindow):
         """Tangani hasil pemuatan model dari thread latar belakang."""
         self._is_loading_model = False
         self._model_combo.setEnabled(True)
+        start_detection = self._start_after_load
+        self._start_after_load = False
         
         if success and self._model_loader_thread:
-            self._detector_service = self._model_loader_thread.detector_service
+            new_detector = self._model_loader_thread.detector_service
+            old_detector = self._detector_service
+
+            # Bawa pengaturan performa dari model lama agar hot-swap tidak mereset tuning
+            if old_detector is not None:
+                new_detector.set_inference_scale(old_detector.get_inference_scale())
+                new_detector.set_skip_frames(old_detector.get_skip_frames())
+                new_detector.set_similarity_skip(old_detector.get_similarity_skip())
+
+            # Tukar referensi secara atomik; frame yang sedang diproses selesai di model lama
+            self._detector_service = new_detector
+            self._inference_service.set_detector(new_detector)
             self._stats_widget.update_model(model_name)
             
             # Aktifkan kembali tombol Start jika ada kamera
@@ -681,6 +791,10 @@ class MainWindow(QMainWindow):
                 self._start_btn.setEnabled(True)
             
             self._status_bar.showMessage(f"✓ Model loaded: {model_name}")
+            
+            # Start diklik saat belum ada model: mulai deteksi sekarang
+            if start_detection:
+                self._on_start()
         else:
             # Aktifkan kembali Start jika sudah ada model sebelumnya
             if self._detector_service is not None:
@@ -744,29 +858,15 @@ class MainWindow(QMainWindow):
             self._status_bar.showMessage("⏳ Model masih dimuat, harap tunggu...")
             return
         
-        self._status_bar.showMessage("Starting detection...")
-        
-        # Muat model AI jika belum dimuat sebelumnya
+        # Muat model AI jika belum dimuat sebelumnya. Pemuatan pertama bisa
+        # mengekspor model (TensorRT/OpenVINO/ONNX) selama beberapa menit, jadi
+        # selalu di thread latar belakang; deteksi dimulai di _on_model_loaded
         if self._detector_service is None:
-            model_name = self._model_combo.currentText()
-            self._status_bar.showMessage("Loading AI model...")
-            
-            # Coba muat secara sinkron jika belum ada sama sekali
-            self._detector_service = DetectorService(model_name, use_gpu=False)
-            
-            if self._detector_service.init_error:
-                error = self._detector_service.init_error
-                self._detector_service = None
-                self._status_bar.showMessage(f"⚠️ Model failed: {error}")
-                QMessageBox.warning(
-                    self,
-                    "Peringatan Model AI",
-                    f"Gagal memuat model {model_name}:\n\n{error}\n\n"
-                    "Deteksi tidak dapat dimulai."
-                )
-                return
-            
-            self._stats_widget.update_model(model_name)
+            self._start_after_load = True
+            self._load_model_async(self._model_combo.currentText())
+            return
+        
+        self._status_bar.showMessage("Starting detection...")
         
         # Buka kamera jika preview belum berjalan
         if not self._is_previewing:
@@ -778,6 +878,8 @@ class MainWindow(QMainWindow):
         
         # Kunci kontrol selama deteksi
         self._is_running = True
+        self._inference_service.set_target_fps(self._video_service.get_target_fps())
+        self._inference_service.set_enabled(True)
         self._start_btn.setEnabled(False)
         self._stop_btn.setEnabled(True)
         self._camera_combo.setEnabled(False)
@@ -807,6 +909,9 @@ class MainWindow(QMainWindow):
         
         # Buka kunci kontrol
         self._is_running = False
+        self._inference_service.set_enabled(False)
+        self._cached_detections = []
+        self._cached_person_count = 0
         self._start_btn.setEnabled(True)
         self._stop_btn.setEnabled(False)
         self._camera_combo.setEnabled(True)
@@ -818,6 +923,8 @@ class MainWindow(QMainWindow):
         
         self._stats_widget.update_status("Stopped", False)
         self._stats_widget.reset_stats()
+        self._shown_person_count = 0
+        self._last_fps_value = 0.0
         self._status_bar.showMessage("Detection stopped - camera preview active")
     
     def _on_mode_changed(self, mode_text: str):
@@ -835,11 +942,15 @@ class MainWindow(QMainWindow):
                 self._video_service.set_target_fps(10)
             else:
                 self._video_service.set_target_fps(DEFAULT_CAPTURE_FPS)
+            self._inference_service.set_target_fps(self._video_service.get_target_fps())
         
         # Reset low-specs state
         self._lowspec_ready = True
         self._last_annotated_frame = None
-        self._frame_times.clear()
+        self._frame_times = [0] * FPS_WINDOW
+        self._frame_times_idx = 0
+        self._frame_times_count = 0
+        self._frame_times_sum = 0
         
         if new_mode == 'low-specs':
             self._status_bar.showMessage("Mode: Low-Specs (reduced CPU usage)")
@@ -850,57 +961,99 @@ class MainWindow(QMainWindow):
         """Mark low-specs mode as ready to process the next frame."""
         self._lowspec_ready = True
     
+    def _on_display_tick(self):
+        """
+        Ambil frame terbaru dari slot layanan video pada laju DISPLAY_FPS.
+        Frame kamera di antara dua tick tidak ditampilkan (dan tidak diantre).
+        """
+        frame = self._video_service.take_latest_frame()
+        if frame is not None:
+            self._on_frame_ready(frame)
+    
     def _on_frame_ready(self, frame: np.ndarray):
         """
         Tangani frame baru dari layanan video.
         Video selalu streaming pada kecepatan kamera.
-        Deteksi YOLO hanya berjalan sesuai target FPS.
-        Pada frame tanpa deteksi, kotak pembatas terakhir digambar ulang.
+        Deteksi YOLO tidak dipicu dari sini: frame dikirim langsung dari thread
+        kamera ke thread inferensi (InferenceService.on_frame).
+        Kotak pembatas terakhir digambar ulang pada setiap frame yang ditampilkan.
         """
-        if not self._is_previewing and not self._is_running:
+        is_running = self._is_running
+        if not is_running and not self._is_previewing:
             return
         
         display_frame = frame
         
-        if self._is_running and self._detector_service is not None:
-            current_time = time.time()
-            detection_interval = 1.0 / self._video_service.get_target_fps()
-            should_detect = (current_time - self._last_detection_time) >= detection_interval
-            
-            if should_detect:
-                # Run YOLO and cache results
-                self._last_detection_time = current_time
-                annotated_frame, person_count, detections = self._detector_service.detect_humans(frame)
-                self._cached_detections = detections
-                self._cached_person_count = person_count
-                display_frame = annotated_frame
-                
-                self._stats_widget.update_person_count(person_count)
-                
-                # Track detection FPS
-                if self._last_frame_time > 0:
-                    frame_interval = current_time - self._last_frame_time
-                    if frame_interval > 0:
-                        self._frame_times.append(frame_interval)
-                self._last_frame_time = current_time
-                
-                if current_time - self._last_fps_update >= 0.25:
-                    if len(self._frame_times) > 0:
-                        avg_interval = sum(self._frame_times) / len(self._frame_times)
-                        real_fps = 1.0 / avg_interval if avg_interval > 0 else 0
-                        self._stats_widget.update_fps(real_fps)
-                    self._last_fps_update = current_time
-            elif self._cached_detections:
-                # Non-detection frame: redraw cached boxes on live video
-                display_frame = self._detector_service._redraw_detections(frame, self._cached_detections)
-            # else: no cached detections yet, show raw frame
+        # Ikat atribut ke variabel lokal sekali per frame (dipanggil 30-60x/detik)
+        detector = self._detector_service
+        detections = self._cached_detections
+        recorder = self._recording_service
+        is_recording = recorder.is_recording()
+        if is_running and detector is not None and detections:
+            # Gambar hasil deteksi terakhir pada video langsung. Tanpa perekaman,
+            # gambar ke buffer yang dipakai ulang; saat merekam, frame diantre ke
+            # encoder latar belakang sehingga tiap frame harus punya array sendiri.
+            out = None
+            if not is_recording:
+                if self._display_buf is None or self._display_buf.shape != frame.shape:
+                    self._display_buf = np.empty_like(frame)
+                out = self._display_buf
+            display_frame = detector._redraw_detections(frame, detections, out=out)
+        # else: no cached detections yet, show raw frame
         
         # Tambahkan ke perekaman jika aktif
-        if self._recording_service.is_recording():
-            self._recording_service.write_frame(display_frame)
+        if is_recording:
+            recorder.write_frame(display_frame)
         
         self._video_widget.update_frame(display_frame)
     
+    def _on_detection_ready(self, person_count: int, detections: list):
+        """Tangani hasil deteksi dari thread inferensi."""
+        if not self._is_running:
+            return  # Hasil terlambat setelah Stop
+        
+        self._cached_detections = detections
+        self._cached_person_count = person_count
+        stats = self._stats_widget
+        stats_visible = self._stats_visible
+        if stats_visible and person_count != self._shown_person_count:
+            stats.update_person_count(person_count)
+            self._shown_person_count = person_count
+        
+        # Track detection FPS (nanodetik integer: jumlah berjalan tidak bergeser)
+        current_time = time.perf_counter_ns()
+        last_frame_time = self._last_frame_time
+        self._last_frame_time = current_time
+        if last_frame_time > 0:
+            frame_interval = current_time - last_frame_time
+            if frame_interval > 0:
+                # Timpa slot tertua di ring, perbarui jumlah berjalan
+                frame_times = self._frame_times
+                idx = self._frame_times_idx
+                self._frame_times_sum += frame_interval - frame_times[idx]
+                frame_times[idx] = frame_interval
+                self._frame_times_idx = (idx + 1) % FPS_WINDOW
+                if self._frame_times_count < FPS_WINDOW:
+                    self._frame_times_count += 1
+        
+        if current_time - self._last_fps_update >= FPS_UPDATE_INTERVAL_NS:
+            count = self._frame_times_count
+            if count > 0 and self._frame_times_sum > 0:
+                real_fps = count * 1e9 / self._frame_times_sum
+                self._last_fps_value = real_fps
+                if stats_visible:
+                    stats.update_fps(real_fps)
+            self._last_fps_update = current_time
+    
+    def _on_splitter_moved(self, pos: int, index: int):
+        """Catat apakah panel statistik diciutkan; segarkan nilainya saat terlihat lagi."""
+        visible = self._splitter.sizes()[1] >= 10
+        if visible and not self._stats_visible and self._is_running:
+            self._stats_widget.update_person_count(self._cached_person_count)
+            self._stats_widget.update_fps(self._last_fps_value)
+            self._shown_person_count = self._cached_person_count
+        self._stats_visible = visible
+    
     def _on_video_error(self, error: str):
         """Tangani kesalahan kamera."""
         self._video_widget.show_error(error)
@@ -915,6 +1068,7 @@ class MainWindow(QMainWindow):
         # Atur ulang semua status
         self._is_previewing = False
         self._is_running = False
+        self._inference_service.set_enabled(False)
         self._start_btn.setEnabled(True)
         self._stop_btn.setEnabled(False)
         self._camera_combo.setEnabled(True)
@@ -923,6 +1077,8 @@ class MainWindow(QMainWindow):
         
         self._stats_widget.update_status("Error", False)
         self._stats_widget.reset_stats()
+        self._shown_person_count = 0
+        self._last_fps_value = 0.0
         
         QMessageBox.warning(
             self,
@@ -954,23 +1110,9 @@ class MainWindow(QMainWindow):
     
     def _on_folder_select(self, pos):
         """Menu konteks klik kanan: pilih folder output baru."""
-        menu = QMenu(self)
-        menu.setStyleSheet("""
-            QMenu {
-                background-color: #1a1a2e;
-                border: 1px solid #2d2d44;
-                color: #ffffff;
-                padding: 4px;
-            }
-            QMenu::item:selected {
-                background-color: #00d9ff;
-                color: #000000;
-            }
-        """)
-        select_action = menu.addAction("📁 Pilih folder output...")
-        action = menu.exec_(self._folder_btn.mapToGlobal(pos))
+        action = self._folder_menu.exec_(self._folder_btn.mapToGlobal(pos))
         
-        if action == select_action:
+        if action is self._folder_select_action:
             folder = QFileDialog.getExistingDirectory(
                 self,
                 "Pilih folder output",
@@ -995,16 +1137,25 @@ class MainWindow(QMainWindow):
             return
         
         try:
-            path = self._recording_service.capture_screenshot(frame)
-            self._status_bar.showMessage(f"✓ Screenshot disimpan: {path}")
+            # Ditulis di latar belakang; hasilnya kembali lewat sinyal screenshot_saved
+            path = self._recording_service.capture_screenshot(frame, self.screenshot_saved.emit)
+            self._status_bar.showMessage(f"⏳ Menyimpan screenshot: {path}")
         except Exception as e:
-            self._status_bar.showMessage(f"⚠️ Screenshot gagal: {e}")
-            QMessageBox.warning(
-                self,
-                "Peringatan Screenshot",
-                f"Gagal menyimpan screenshot:\n\n{e}\n\n"
-                "Periksa folder output dan ruang disk."
-            )
+            self._on_screenshot_saved("", str(e))
+    
+    def _on_screenshot_saved(self, path: str, error: str):
+        """Tangani hasil penulisan screenshot (dipanggil di thread GUI)."""
+        if not error:
+            self._status_bar.showMessage(f"✓ Screenshot disimpan: {path}")
+            return
+        
+        self._status_bar.showMessage(f"⚠️ Screenshot gagal: {error}")
+        QMessageBox.warning(
+            self,
+            "Peringatan Screenshot",
+            f"Gagal menyimpan screenshot:\n\n{error}\n\n"
+            "Periksa folder output dan ruang disk."
+        )
     
     def _on_record_toggle(self):
         """Mulai atau hentikan perekaman video."""
@@ -1029,10 +1180,11 @@ class MainWindow(QMainWindow):
             
             try:
                 h, w = frame.shape[:2]
-                path = self._recording_service.start_recording(w, h)
+                path = self._recording_service.start_recording(w, h, self.recording_failed.emit)
                 self._record_btn.setText("⏹ Recording..." if not self._compact_mode else "⏹")
                 self._record_btn.setStyleSheet(styles.get_button_style("#ff4757", "#ff3344"))
-                self._status_bar.showMessage(f"Recording to: {path}")
+                encoder = self._recording_service.get_encoder_backend()
+                self._status_bar.showMessage(f"Recording to: {path} ({encoder})")
             except Exception as e:
                 self._status_bar.showMessage(f"⚠️ Record failed: {e}")
                 QMessageBox.warning(
@@ -1042,6 +1194,22 @@ class MainWindow(QMainWindow):
                     "Periksa folder output dan ruang disk."
                 )
     
+    def _on_recording_failed(self, error: str):
+        """Hentikan perekaman saat encoder gagal (dipanggil di thread GUI)."""
+        if not self._recording_service.is_recording():
+            return
+        
+        saved = self._recording_service.stop_recording()
+        self._record_btn.setText("⏺ Record" if not self._compact_mode else "⏺")
+        self._record_btn.setStyleSheet(styles.get_button_style("#4a4a6a", "#ff4757"))
+        self._status_bar.showMessage(f"⚠️ Recording stopped: {error}")
+        QMessageBox.warning(
+            self,
+            "Peringatan Perekaman",
+            f"Perekaman berhenti karena encoder gagal:\n\n{error}\n\n"
+            f"Bagian yang sudah terekam disimpan di:\n{saved}"
+        )
+    
     # =========================================================================
     # Window Events & Tata Letak Responsif
     # =========================================================================
@@ -1076,7 +1244,21 @@ class MainWindow(QMainWindow):
     def resizeEvent(self, event):
         """Beralih ke tata letak kompak saat lebar jendela turun di bawah 900px."""
         super().resizeEvent(event)
-        compact = self.width() < 900
+        self._compact_timer.start()  # restart: terapkan setelah resize berhenti sejenak
+    
+    def _apply_compact_mode(self):
+        """
+        Terapkan tata letak kompak dengan histeresis: lebar di dalam pita
+        ±COMPACT_LAYOUT_HYSTERESIS di sekitar batas tidak mengubah mode.
+        """
+        width = self.width()
+        if width < COMPACT_LAYOUT_WIDTH - COMPACT_LAYOUT_HYSTERESIS:
+            compact = True
+        elif width > COMPACT_LAYOUT_WIDTH + COMPACT_LAYOUT_HYSTERESIS:
+            compact = False
+        else:
+            return
+        
         if compact != self._compact_mode:
             self._compact_mode = compact
             self._update_button_labels()
@@ -1087,6 +1269,7 @@ class MainWindow(QMainWindow):
         self._recording_service.cleanup()
         if self._is_running or self._is_previewing:
             self._video_service.stop_capture()
+        self._inference_service.stop_service()
         event.accept()
     
     # =========================================================================
@@ -1106,4 +1289,5 @@ class MainWindow(QMainWindow):
     def _on_settings_applied(self, fps: int):
         """Callback when settings are applied from the dialog."""
         self._stats_widget.update_target_fps(fps)
+        self._inference_service.set_target_fps(self._video_service.get_target_fps())
         self._status_bar.showMessage(f"Settings applied — Target FPS: {fps}")
@@ -5,43 +5,85 @@ Menangani inisialisasi aplikasi, optimisasi CPU, dan error startup.
 
 import sys
 import os
+import struct
 import traceback
 
-# Periksa dependensi kritis sebelum inisialisasi Qt
-try:
-    import torch
-except ImportError:
-    print(
-        "WARNING: PyTorch tidak terinstall. "
-        "Deteksi AI tidak akan berfungsi.\n"
-        "Install dengan: pip install torch torchvision"
-    )
-except Exception as e:
-    print(f"WARNING: Gagal memuat PyTorch: {e}")
-
 from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+
+from utils.constants import DISPLAY_OPENCL_SCALING
+
+
+def _physical_core_count() -> int:
+    """
+    Hitung core fisik (tanpa saudara SMT/Hyper-Threading) lewat
+    GetLogicalProcessorInformationEx di Windows; jika gagal (atau bukan
+    Windows), kembali ke jumlah core logis.
+    """
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            from ctypes import wintypes
+            
+            kernel32 = ctypes.windll.kernel32
+            relation_processor_core = 0  # RelationProcessorCore
+            length = wintypes.DWORD(0)
+            # Panggilan pertama hanya menanyakan ukuran buffer yang dibutuhkan
+            kernel32.GetLogicalProcessorInformationEx(relation_processor_core, None, ctypes.byref(length))
+            buffer = ctypes.create_string_buffer(length.value)
+            if kernel32.GetLogicalProcessorInformationEx(relation_processor_core, buffer, ctypes.byref(length)):
+                # Satu record per core fisik; setiap record diawali
+                # DWORD Relationship dan DWORD Size
+                cores = 0
+                offset = 0
+                while offset < length.value:
+                    relationship, size = struct.unpack_from("<II", buffer, offset)
+                    if size == 0:
+                        break
+                    if relationship == relation_processor_core:
+                        cores += 1
+                    offset += size
+                if cores:
+                    return cores
+        except (OSError, AttributeError, struct.error):
+            pass
+    
+    return os.cpu_count() or 2
+
+
+def _log_simd_level(cv2):
+    """Cetak fitur SIMD baseline/dispatch OpenCV agar regresi build terlihat."""
+    for line in cv2.getBuildInformation().splitlines():
+        line = line.strip()
+        if line.startswith(("Baseline:", "Dispatched code:")):
+            print(f"OpenCV SIMD {line}")
 
 
 def _boost_process_priority():
     """
     Optimalkan prioritas proses dan threading OpenCV secara dinamis.
     Menyesuaikan agresivitas berdasarkan jumlah core CPU perangkat:
-    - 8+ core: HIGH priority, semua core untuk OpenCV
-    - 4-7 core: ABOVE_NORMAL priority, sisakan 1 core
-    - 1-3 core: NORMAL priority, gunakan semua yang ada
+    - 8+ core: HIGH priority
+    - 4-7 core: ABOVE_NORMAL priority
+    - 1-3 core: NORMAL priority
+    OpenCV memakai core fisik (dikurangi 1 untuk UI pada 4+ core):
+    kernel OpenCV terikat memori dan tidak diuntungkan thread SMT.
     """
     import cv2
     
     cpu_count = os.cpu_count() or 2
     
-    # Atur thread OpenCV secara dinamis
-    if cpu_count >= 8:
-        cv2.setNumThreads(cpu_count)
-    elif cpu_count >= 4:
-        cv2.setNumThreads(cpu_count - 1)  # Sisakan 1 untuk UI
-    else:
-        cv2.setNumThreads(cpu_count)  # Gunakan semua yang ada
+    # Jalur SIMD teroptimasi (SSE/AVX) dan thread OpenCV berdasarkan core fisik
+    cv2.setUseOptimized(True)
+    _log_simd_level(cv2)
+    physical_cores = _physical_core_count()
+    cv2.setNumThreads(physical_cores - 1 if physical_cores >= 4 else physical_cores)
+    
+    # OpenCV sudah mengaktifkan OpenCL secara default; nama perangkat hanya
+    # dicatat jika penskalaan pratinjau lewat UMat diaktifkan, karena
+    # Device.getDefault() membuat konteks OpenCL di thread GUI
+    if DISPLAY_OPENCL_SCALING and cv2.ocl.useOpenCL():
+        print(f"OpenCL enabled: {cv2.ocl.Device.getDefault().name()}")
     
     # Tingkatkan prioritas proses di Windows
     if sys.platform == 'win32':
@@ -63,6 +105,10 @@ def _boost_process_priority():
                 priority_name = "NORMAL"
             
             ctypes.windll.kernel32.SetPriorityClass(handle, priority)
+            
+            # Resolusi timer sistem 1 ms (default 15.6 ms) agar QTimer tampilan
+            # dan time.sleep tepat waktu; dikembalikan otomatis saat proses keluar
+            ctypes.windll.winmm.timeBeginPeriod(1)
             print(f"Process priority: {priority_name} ({cpu_count} CPU cores, OpenCV threads: {cv2.getNumThreads()})")
         except Exception as e:
             print(f"Could not set process priority: {e}")
@@ -78,6 +124,10 @@ def _boost_process_priority():
 
 def main():
     """Titik masuk utama untuk aplikasi"""
+    # PyTorch tidak diimpor di sini: impornya memakan 1-3 detik dan menunda
+    # jendela pertama. Model dimuat (dan torch diimpor) di thread latar belakang;
+    # jika PyTorch tidak ada, DetectorService melaporkannya lewat dialog peringatan.
+    
     # Aktifkan penskalaan DPI tinggi
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
@@ -87,9 +137,6 @@ def main():
     app.setApplicationName("Human Detection App")
     app.setOrganizationName("HumanDetection")
     
-    # Optimalkan CPU: prioritas tinggi + semua core
-    _boost_process_priority()
-    
     try:
         # Impor di sini untuk menghindari impor circular
         from app import MainWindow
@@ -98,6 +145,9 @@ def main():
         window = MainWindow()
         window.show()
         
+        # Optimalkan CPU (prioritas + thread OpenCV) setelah jendela tampil
+        QTimer.singleShot(0, _boost_process_priority)
+        
     except Exception as e:
         # Tampilkan error fatal sebagai dialog agar terlihat oleh pengguna
         error_msg = (
@@ -5,4 +5,5 @@ Services Package
 from services.camera_service import CameraService, CameraScanThread
 from services.video_service import VideoService
 from services.detector_service import DetectorService
+from services.inference_service import InferenceService
 from services.recording_service import RecordingService
@@ -6,9 +6,111 @@ Pemindaian dilakukan di thread latar belakang agar UI tidak freeze.
 
 import cv2
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 from PyQt5.QtCore import QThread, pyqtSignal
-from utils.constants import MAX_CAMERA_INDEX
+from utils.constants import (
+    MAX_CAMERA_INDEX, CAMERA_SCAN_MAX_MISSES, CAMERA_FIRST_FRAME_TIMEOUT
+)
+
+
+# Backend yang dicoba per indeks, dalam urutan preferensi
+_SCAN_BACKENDS = [
+    (cv2.CAP_DSHOW, "DirectShow"),
+    (cv2.CAP_MSMF, "MSMF"),
+]
+
+
+def _wait_for_first_frame(cap: cv2.VideoCapture, max_wait: float = CAMERA_FIRST_FRAME_TIMEOUT,
+                          step: float = 0.01) -> bool:
+    """
+    Ambil frame berulang dengan jeda pendek hingga berhasil atau max_wait habis.
+    Kamera yang sudah siap lolos pada percobaan pertama, tanpa jeda tetap;
+    webcam USB/UVC yang lambat tetap punya waktu untuk frame pertamanya.
+    Memakai grab() saja: cukup untuk uji hidup, tanpa decode/salin frame.
+    
+    Returns:
+        True if a frame was captured
+    """
+    deadline = time.perf_counter() + max_wait
+    while True:
+        if cap.grab():
+            return True
+        if time.perf_counter() >= deadline:
+            return False
+        time.sleep(step)
+
+
+def _probe_index(index: int) -> Optional[Dict]:
+    """
+    Periksa satu indeks kamera dengan setiap backend secara berurutan.
+    MSMF tetap dicoba saat DirectShow gagal membuka atau membaca, karena
+    sebagian kamera hanya berfungsi lewat MSMF.
+    
+    Args:
+        index: Camera index to probe
+        
+    Returns:
+        Camera info dict, or None if no backend could capture a frame
+    """
+    for backend, backend_name in _SCAN_BACKENDS:
+        try:
+            cap = cv2.VideoCapture(index, backend)
+            
+            if not cap.isOpened():
+                cap.release()
+                continue
+            
+            # Resolusi bawaan perangkat (yang ditampilkan ke pengguna), dibaca
+            # sebelum format probe diterapkan
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            
+            # Probe dengan MJPG kecil: frame pertama lebih cepat dan tidak
+            # membebani bus USB seperti YUY2 resolusi penuh
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 320)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 240)
+            
+            # Verifikasi kamera benar-benar bisa menangkap frame
+            if _wait_for_first_frame(cap):
+                cap.release()
+                return {
+                    'index': index,
+                    'name': f"Camera {index}",
+                    'resolution': (width, height)
+                }
+            
+            cap.release()
+            
+        except Exception as e:
+            print(f"Error scanning camera {index} with {backend_name}: {e}")
+    
+    return None
+
+
+def _scan_cameras() -> List[Dict]:
+    """
+    Periksa indeks secara berurutan. Backend DirectShow OpenCV memakai satu
+    instance videoInput global yang tidak thread-safe, jadi perangkat tidak
+    boleh dibuka bersamaan. Pemindaian berhenti setelah CAMERA_SCAN_MAX_MISSES
+    indeks kosong berturut-turut (indeks kamera di Windows berurutan).
+    
+    Returns:
+        Camera info dicts sorted by index
+    """
+    cameras = []
+    misses = 0
+    for index in range(MAX_CAMERA_INDEX):
+        camera = _probe_index(index)
+        if camera is None:
+            misses += 1
+            if misses >= CAMERA_SCAN_MAX_MISSES:
+                break
+            continue
+        misses = 0
+        cameras.append(camera)
+    
+    return cameras
 
 
 class CameraScanThread(QThread):
@@ -21,48 +123,7 @@ class CameraScanThread(QThread):
     def run(self):
         """Pindai kamera di thread terpisah."""
         try:
-            cameras = []
-            backends = [
-                (cv2.CAP_DSHOW, "DirectShow"),
-                (cv2.CAP_MSMF, "MSMF"),
-            ]
-
-            for index in range(MAX_CAMERA_INDEX):
-                for backend, backend_name in backends:
-                    try:
-                        cap = cv2.VideoCapture(index, backend)
-                        
-                        if not cap.isOpened():
-                            cap.release()
-                            continue
-                        
-                        # Pemanasan singkat sebelum membaca
-                        time.sleep(0.1)
-                        
-                        # Verifikasi kamera benar-benar bisa menangkap frame
-                        ret, frame = cap.read()
-                        
-                        if ret and frame is not None:
-                            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                            
-                            cameras.append({
-                                'index': index,
-                                'name': f"Camera {index}",
-                                'resolution': (width, height)
-                            })
-                            
-                            cap.release()
-                            break  # Ditemukan kamera yang berfungsi, coba indeks berikutnya
-                        else:
-                            cap.release()
-                            
-                    except Exception as e:
-                        print(f"Error scanning camera {index} with {backend_name}: {e}")
-                        continue
-            
-            self.cameras_found.emit(cameras)
-            
+            self.cameras_found.emit(_scan_cameras())
         except Exception as e:
             self.scan_error.emit(f"Gagal memindai kamera: {e}")
 
@@ -78,6 +139,10 @@ class CameraService:
         self._cameras: List[Dict] = []
         self._scan_thread: CameraScanThread = None
     
+    def _store_cameras(self, cameras: list):
+        """Simpan hasil pemindaian terakhir."""
+        self._cameras = cameras
+    
     def scan_async(self) -> CameraScanThread:
         """
         Pindai kamera di thread latar belakang (tidak memblokir UI).
@@ -86,6 +151,7 @@ class CameraService:
             CameraScanThread — hubungkan sinyal cameras_found / scan_error sebelum mulai.
         """
         self._scan_thread = CameraScanThread()
+        self._scan_thread.cameras_found.connect(self._store_cameras)
         return self._scan_thread
     
     def get_available_cameras(self) -> List[Dict]:
@@ -97,43 +163,6 @@ class CameraService:
             Daftar dict dengan info kamera:
             {'index': int, 'name': str, 'resolution': (width, height)}
         """
-        cameras = []
-        
-        backends = [
-            (cv2.CAP_DSHOW, "DirectShow"),
-            (cv2.CAP_MSMF, "MSMF"),
-        ]
-        
-        for index in range(MAX_CAMERA_INDEX):
-            for backend, backend_name in backends:
-                try:
-                    cap = cv2.VideoCapture(index, backend)
-                    
-                    if not cap.isOpened():
-                        cap.release()
-                        continue
-                    
-                    time.sleep(0.1)
-                    ret, frame = cap.read()
-                    
-                    if ret and frame is not None:
-                        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                        
-                        cameras.append({
-                            'index': index,
-                            'name': f"Camera {index}",
-                            'resolution': (width, height)
-                        })
-                        
-                        cap.release()
-                        break
-                    else:
-                        cap.release()
-                        
-                except Exception as e:
-                    print(f"Error scanning camera {index} with {backend_name}: {e}")
-                    continue
-        
-        self._cameras = cameras
+        cameras = _scan_cameras()
+        self._store_cameras(cameras)
         return cameras
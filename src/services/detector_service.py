@@ -1,12 +1,16 @@
 """
 Layanan Detektor - Deteksi Manusia YOLO
 Menyediakan deteksi orang berbasis AI menggunakan model YOLO (v8, v11, v12).
-Inferensi hanya CPU — dioptimalkan untuk menggunakan semua core CPU.
+Inferensi di CPU secara default — dioptimalkan untuk menggunakan semua core CPU,
+lewat OpenVINO atau ONNX Runtime jika terpasang (atau PyTorch).
+Jika GPU diminta dan CUDA tersedia, memakai engine TensorRT FP16 (atau PyTorch CUDA).
 """
 
 import os
 import sys
 import cv2
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
 from typing import Tuple, List, Dict, Optional
 
@@ -15,10 +19,20 @@ from utils.constants import (
     DEFAULT_MODEL, 
     CONFIDENCE_THRESHOLD, 
     PERSON_CLASS_ID,
+    INFERENCE_IMGSZ,
     DETECTION_BOX_COLOR,
     INFERENCE_SCALE,
-    SKIP_FRAMES_DEFAULT
+    SKIP_FRAMES_DEFAULT,
+    MODEL_CACHE_FOLDER,
+    MODEL_DOWNLOAD_URL,
+    MODEL_DOWNLOAD_TIMEOUT,
+    SIMILARITY_SKIP_DEFAULT,
+    FRAME_DIFF_SIZE,
+    FRAME_DIFF_THRESHOLD,
+    SIMILARITY_MAX_SKIP_MS
 )
+from utils import fast_post
+from utils.fast_post import scale_and_filter
 
 import time
 
@@ -30,6 +44,100 @@ CONFIDENCE_UPDATE_INTERVAL = 0.25
 # Lebih rendah = lebih halus/lambat, Lebih tinggi = lebih cepat/gugup
 BOX_SMOOTHING_FACTOR = 0.3
 
+# Filter class untuk NMS ultralytics (hanya orang)
+_PERSON_CLASSES = [PERSON_CLASS_ID]
+
+# IoU minimum agar deteksi dianggap objek yang sama dengan pelacak
+TRACKER_IOU_THRESHOLD = 0.5
+
+
+# Path model yang sudah ditemukan per nama file (hanya string, paling banyak
+# satu per entri YOLO_MODELS), dan model yang sudah dimuat per (path, perangkat)
+# — berbagi antar instance agar ganti model bolak-balik instan. Model dibatasi
+# ke model aktif + satu model sebelumnya agar RAM/VRAM tidak terus bertambah
+_PATH_CACHE: Dict[str, str] = {}
+_MODEL_CACHE: "OrderedDict[Tuple[str, str], Tuple[object, str]]" = OrderedDict()
+_MODEL_CACHE_SIZE = 2
+
+# Status pelacak kosong bersama (hanya dibaca, tidak pernah diubah di tempat)
+_NO_TRACKER_BOXES = np.empty((0, 4), dtype=np.float64)
+
+
+def _cache_model(cache_key: Tuple[str, str], model, backend: str):
+    """
+    Simpan model sebagai entri terbaru di _MODEL_CACHE dan buang entri terlama
+    di luar _MODEL_CACHE_SIZE. Memori GPU dilepas jika model CUDA terbuang.
+    """
+    _MODEL_CACHE[cache_key] = (model, backend)
+    _MODEL_CACHE.move_to_end(cache_key)
+    
+    evicted_gpu = False
+    while len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+        oldest_key = next(iter(_MODEL_CACHE))
+        del _MODEL_CACHE[oldest_key]
+        evicted_gpu = evicted_gpu or oldest_key[1] != "cpu"
+    
+    if evicted_gpu:
+        _free_gpu_memory()
+
+
+def _free_gpu_memory():
+    """Kumpulkan model yang terbuang lalu kembalikan blok CUDA cache ke driver."""
+    import gc
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception as e:
+        print(f"Warning: Failed to release GPU memory: {e}")
+
+
+@lru_cache(maxsize=128)
+def _label_sprite(label: str) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    Render label sekali (latar hijau + teks hitam) ke kanvas kecil beserta masknya.
+    Label hanya "Person 0%".."Person 100%", jadi hasilnya di-cache. Kanvas diberi
+    margin agar goresan teks yang keluar dari kotak latar ikut tertangkap.
+    
+    Returns:
+        (BGR sprite, bool mask, x offset, y offset) — offsets relative to the
+        box's top-left corner (x1, y1)
+    """
+    (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+    margin = 4
+    top = th + 10 + margin  # Baris kanvas untuk y1
+    canvas_h = top + margin
+    canvas_w = tw + 2 * margin
+    
+    sprite = np.zeros((canvas_h, canvas_w, 3), dtype=np.uint8)
+    mask = np.zeros((canvas_h, canvas_w), dtype=np.uint8)
+    for img, bg, fg in ((sprite, DETECTION_BOX_COLOR, (0, 0, 0)), (mask, 255, 255)):
+        cv2.rectangle(img, (margin, top - th - 10), (margin + tw, top), bg, -1)
+        cv2.putText(img, label, (margin, top - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, fg, 2)
+    return sprite, mask.astype(bool), -margin, -top
+
+
+def _blit_label(frame: np.ndarray, label: str, x1: int, y1: int):
+    """Tempel sprite label pada frame di pojok kiri atas kotak (terpotong di tepi frame)."""
+    sprite, mask, ox, oy = _label_sprite(label)
+    sh, sw = mask.shape
+    fh, fw = frame.shape[:2]
+    x0, y0 = x1 + ox, y1 + oy
+    
+    # Potong ke batas frame
+    fx0, fy0 = max(x0, 0), max(y0, 0)
+    fx1, fy1 = min(x0 + sw, fw), min(y0 + sh, fh)
+    if fx0 >= fx1 or fy0 >= fy1:
+        return
+    sx0, sy0 = fx0 - x0, fy0 - y0
+    sx1, sy1 = sx0 + (fx1 - fx0), sy0 + (fy1 - fy0)
+    
+    np.copyto(
+        frame[fy0:fy1, fx0:fx1], sprite[sy0:sy1, sx0:sx1],
+        where=mask[sy0:sy1, sx0:sx1, None]
+    )
+
 
 class DetectorService:
     """
@@ -43,27 +151,41 @@ class DetectorService:
         
         Args:
             model_name: Name of the model from YOLO_MODELS
-            use_gpu: Ignored (CPU-only mode)
+            use_gpu: Use CUDA (and TensorRT if installed) when available
         """
         self._model = None
         self._model_name: str = model_name
         self._device: str = "cpu"
+        self._backend: str = "torch"  # 'torch', 'tensorrt', 'openvino', atau 'onnx'
+        self._use_gpu: bool = use_gpu
+        self._half: bool = False  # FP16 untuk model PyTorch di CUDA
         self._confidence: float = CONFIDENCE_THRESHOLD
         self._last_detections: List[Dict] = []
         
-        # Pelacakan untuk stabilisasi kepercayaan
-        # format: {track_id: {'conf': float, 'last_update': float, 'bbox': tuple}}
-        self._trackers = {}
+        # Pelacakan untuk stabilisasi kepercayaan, sebagai array paralel (SoA):
+        # baris i = satu pelacak (id, bbox float x1,y1,x2,y2, kepercayaan tampil,
+        # waktu pembaruan kepercayaan terakhir)
+        self._tracker_ids: List[int] = []
+        self._tracker_boxes: np.ndarray = _NO_TRACKER_BOXES
+        self._tracker_confs: List[float] = []
+        self._tracker_updates: List[float] = []
         self._next_track_id = 0
         
         # Performance: inference downscaling
         self._inference_scale: float = INFERENCE_SCALE
+        self._inference_buf: Optional[np.ndarray] = None  # reused resize target
         
         # Performance: skip-frame detection
         self._skip_frames: int = SKIP_FRAMES_DEFAULT
         self._frame_counter: int = 0
         self._last_annotated_detections: List[Dict] = []  # cached detections for redraw
         
+        # Performance: lewati YOLO jika frame hampir sama dengan frame terakhir
+        # yang diinferensi (selisih piksel thumbnail grayscale)
+        self._similarity_skip: bool = SIMILARITY_SKIP_DEFAULT
+        self._last_frame_thumb: Optional[np.ndarray] = None  # None = belum ada hasil yang valid
+        self._last_inference_time: float = 0.0
+        
         self._torch_available = False
         self._init_error: Optional[str] = None
         
@@ -87,7 +209,7 @@ class DetectorService:
         
         # Muat model jika PyTorch tersedia
         if self._torch_available:
-            self.load_model(model_name)
+            self.load_model(model_name, use_gpu)
     
     def _optimize_cpu(self):
         """
@@ -140,11 +262,22 @@ class DetectorService:
         """Cek nama model saat ini"""
         return self._model_name
     
+    @property
+    def device(self) -> str:
+        """Cek perangkat inferensi saat ini ('cpu' atau 'cuda:0')"""
+        return self._device
+    
+    @property
+    def backend(self) -> str:
+        """Cek backend inferensi saat ini ('torch', 'tensorrt', 'openvino', atau 'onnx')"""
+        return self._backend
+    
     def _get_model_path(self, model_file: str) -> str:
         """
         Cari path file model.
-        Periksa secara berurutan: bundel PyInstaller, dir saat ini, dir proyek.
-        Kembali ke nama file asli (ultralytics akan mengunduh).
+        Periksa secara berurutan: bundel PyInstaller, dir saat ini, dir proyek,
+        cache model pengguna. Jika tidak ada, unduh ke cache model.
+        Kembali ke nama file asli jika unduhan gagal (ultralytics akan mencoba).
         
         Args:
             model_file: Model filename (e.g., 'yolov8n.pt')
@@ -152,6 +285,17 @@ class DetectorService:
         Returns:
             Full path to the model file
         """
+        cached = _PATH_CACHE.get(model_file)
+        if cached is not None and os.path.exists(cached):
+            return cached
+        
+        path = self._find_model_path(model_file)
+        if os.path.exists(path):
+            _PATH_CACHE[model_file] = path
+        return path
+    
+    def _find_model_path(self, model_file: str) -> str:
+        """Cari path file model tanpa cache (lihat _get_model_path)."""
         # Periksa bundel PyInstaller terlebih dahulu (untuk .exe yang dipaketkan)
         if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
             bundle_path = os.path.join(sys._MEIPASS, model_file)
@@ -170,17 +314,64 @@ class DetectorService:
         if os.path.exists(project_path):
             return project_path
         
-        # Model tidak ditemukan secara lokal - ultralytics akan mengunduhnya
+        # Periksa cache model pengguna
+        cache_path = os.path.join(MODEL_CACHE_FOLDER, model_file)
+        if os.path.exists(cache_path):
+            return cache_path
+        
+        # Unduh sekali ke cache model
+        downloaded = self._download_model(model_file, cache_path)
+        if downloaded:
+            return downloaded
+        
+        # Unduhan gagal - biarkan ultralytics mencoba mengunduhnya
         print(f"Model not found locally, will attempt download: {model_file}")
         return model_file
     
+    def _download_model(self, model_file: str, cache_path: str) -> Optional[str]:
+        """
+        Unduh file model ke cache pengguna.
+        Ditulis ke file sementara lalu di-rename agar unduhan yang terputus
+        tidak meninggalkan file model rusak.
+        
+        Args:
+            model_file: Model filename (e.g., 'yolov8n.pt')
+            cache_path: Destination path in the model cache
+            
+        Returns:
+            Path to the downloaded file, or None if the download failed
+        """
+        import shutil
+        import urllib.request
+        
+        url = MODEL_DOWNLOAD_URL.format(file=model_file)
+        tmp_path = cache_path + ".part"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            print(f"Downloading model: {url}")
+            # Timeout berlaku untuk koneksi dan setiap pembacaan, sehingga koneksi
+            # yang macet gagal alih-alih menggantung pemuatan model selamanya
+            with urllib.request.urlopen(url, timeout=MODEL_DOWNLOAD_TIMEOUT) as response, \
+                    open(tmp_path, "wb") as f:
+                shutil.copyfileobj(response, f)
+            os.replace(tmp_path, cache_path)
+            print(f"Model cached at: {cache_path}")
+            return cache_path
+        except Exception as e:
+            print(f"Model download failed: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+    
     def load_model(self, model_name: str, use_gpu: bool = False) -> bool:
         """
         Muat model YOLO.
         
         Args:
             model_name: Name of the model from YOLO_MODELS
-            use_gpu: Ignored (CPU-only mode)
+            use_gpu: Use CUDA (and TensorRT if installed) when available
             
         Returns:
             True if model loaded successfully
@@ -199,12 +390,59 @@ class DetectorService:
             model_file = YOLO_MODELS[model_name]["file"]
             model_path = self._get_model_path(model_file)
             
-            # Muat model di CPU
-            self._model = YOLO(model_path)
-            self._model.to(self._device)
+            self._use_gpu = use_gpu
+            self._device = self._select_device(use_gpu)
+            
+            # Model ini sudah pernah dimuat di perangkat yang sama: pakai ulang
+            cache_key = (os.path.abspath(model_path), self._device)
+            if cache_key in _MODEL_CACHE:
+                _MODEL_CACHE.move_to_end(cache_key)
+                self._model, self._backend = _MODEL_CACHE[cache_key]
+                self._half = self._device != "cpu" and self._backend == "torch"
+                self._model_name = model_name
+                print(f"Reusing loaded {model_name} on {self._device} ({self._backend})")
+                return True
+            
+            # Di GPU, utamakan engine TensorRT; di CPU, OpenVINO lalu ONNX Runtime.
+            # Kembali ke PyTorch jika tidak ada yang tersedia
+            if self._device != "cpu":
+                candidates = [("tensorrt", self._get_engine_path)]
+            else:
+                candidates = [("openvino", self._get_openvino_path), ("onnx", self._get_onnx_path)]
+            self._model = None
+            for exported_backend, get_path in candidates:
+                exported_path = get_path(model_path)
+                if not exported_path:
+                    continue
+                try:
+                    model = YOLO(exported_path, task="detect")
+                    # Ultralytics baru memuat engine/IR/ONNX saat predict pertama:
+                    # paksa di sini agar model rusak/tidak cocok gagal di try ini
+                    model(self._probe_frame(), verbose=False, device=self._device,
+                          classes=_PERSON_CLASSES)
+                    self._model = model
+                    self._backend = exported_backend
+                    break
+                except Exception as e:
+                    # Model ekspor rusak/tidak cocok — buang, dan tandai gagal agar
+                    # tidak diekspor/dimuat ulang pada setiap pemuatan model
+                    print(f"{exported_backend} model unusable: {e}")
+                    self._remove_export(exported_path)
+                    self._mark_export_failed(exported_path)
+            if self._model is None:
+                self._model = YOLO(model_path)
+                self._model.to(self._device)
+                self._backend = "torch"
+            
+            # Engine TensorRT sudah FP16; model PyTorch di CUDA dijalankan
+            # dengan half=True (ultralytics mengonversi model & input ke FP16)
+            self._half = self._device != "cpu" and self._backend == "torch"
+            if self._device != "cpu":
+                self._enable_tf32()
             self._model_name = model_name
+            _cache_model(cache_key, self._model, self._backend)
             
-            print(f"Loaded {model_name} on {self._device}")
+            print(f"Loaded {model_name} on {self._device} ({self._backend})")
             return True
             
         except Exception as e:
@@ -212,6 +450,289 @@ class DetectorService:
             self._init_error = str(e)
             return False
     
+    @staticmethod
+    def _probe_frame() -> np.ndarray:
+        """Frame hitam seukuran input model untuk memaksa backend ekspor dimuat."""
+        return np.zeros((INFERENCE_IMGSZ, INFERENCE_IMGSZ, 3), dtype=np.uint8)
+    
+    def _enable_tf32(self):
+        """Izinkan TF32 Tensor Core untuk matmul FP32 yang tersisa (GPU Ampere+)."""
+        try:
+            import torch
+            torch.set_float32_matmul_precision("high")
+        except (AttributeError, RuntimeError):
+            pass  # PyTorch lama
+    
+    def _select_device(self, use_gpu: bool) -> str:
+        """
+        Pilih perangkat inferensi.
+        
+        Args:
+            use_gpu: True untuk memakai CUDA jika tersedia
+            
+        Returns:
+            'cuda:0' jika GPU diminta dan tersedia, selain itu 'cpu'
+        """
+        if not use_gpu:
+            return "cpu"
+        
+        import torch
+        if torch.cuda.is_available():
+            return "cuda:0"
+        
+        print("CUDA not available, falling back to CPU")
+        return "cpu"
+    
+    def _get_engine_path(self, model_path: str) -> Optional[str]:
+        """
+        Cari atau buat engine TensorRT FP16 untuk model.
+        Engine INT8 ({stem}_int8-<gpu>-trt<versi>.engine) dipakai jika ada di samping
+        model atau di cache; jika tidak, engine FP16 diekspor sekali ke cache
+        model pengguna lalu dipakai ulang.
+        Engine hanya valid untuk GPU dan versi TensorRT yang membuatnya,
+        jadi keduanya menjadi bagian dari nama file.
+        
+        Args:
+            model_path: Path to the .pt model file
+            
+        Returns:
+            Path to the .engine file, or None if TensorRT is unavailable
+        """
+        try:
+            import tensorrt
+            import torch
+        except ImportError:
+            return None
+        
+        gpu_name = torch.cuda.get_device_name(0)
+        gpu_tag = "".join(c if c.isalnum() else "_" for c in gpu_name).strip("_").lower()
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        engine_suffix = f"{gpu_tag}-trt{tensorrt.__version__}.engine"
+        
+        # Engine INT8 terkalibrasi (dibuat terpisah dengan data kalibrasi) diutamakan
+        int8_name = f"{stem}_int8-{engine_suffix}"
+        for folder in (os.path.dirname(os.path.abspath(model_path)), MODEL_CACHE_FOLDER):
+            int8_path = os.path.join(folder, int8_name)
+            if os.path.exists(int8_path) and not self._export_failed(int8_path):
+                return int8_path
+        
+        engine_path = os.path.join(MODEL_CACHE_FOLDER, f"{stem}-{engine_suffix}")
+        if self._export_failed(engine_path):
+            return None
+        if os.path.exists(engine_path):
+            return engine_path
+        
+        try:
+            import shutil
+            from ultralytics import YOLO
+            
+            # Ultralytics menulis .onnx/.engine di samping .pt; ekspor dari salinan
+            # di cache agar tidak menulis ke folder bundel/aplikasi (bisa read-only)
+            os.makedirs(MODEL_CACHE_FOLDER, exist_ok=True)
+            source_path = os.path.join(MODEL_CACHE_FOLDER, os.path.basename(model_path))
+            if not os.path.exists(source_path):
+                shutil.copy2(model_path, source_path)
+            
+            print(f"Exporting TensorRT engine (one-time): {engine_path}")
+            exported = YOLO(source_path).export(
+                format="engine", half=True, imgsz=INFERENCE_IMGSZ,
+                dynamic=False, device=0, verbose=False
+            )
+            if not exported:
+                self._mark_export_failed(engine_path)
+                return None
+            os.replace(str(exported), engine_path)
+            return engine_path
+        except Exception as e:
+            print(f"TensorRT export failed: {e}")
+            self._mark_export_failed(engine_path)
+            return None
+    
+    def _remove_export(self, path: str):
+        """Hapus model ekspor di cache (file .engine/.onnx atau folder OpenVINO)."""
+        import shutil
+        # Hanya hasil ekspor aplikasi; model yang disediakan pengguna tidak disentuh
+        cache_dir = os.path.abspath(MODEL_CACHE_FOLDER)
+        if os.path.dirname(os.path.abspath(path)) != cache_dir:
+            return
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _failed_marker_path(path: str) -> str:
+        """Path file penanda ekspor gagal untuk model ekspor (selalu di cache model)."""
+        name = os.path.basename(os.path.normpath(path))
+        return os.path.join(MODEL_CACHE_FOLDER, f"{name}.failed")
+    
+    @staticmethod
+    def _ultralytics_version() -> str:
+        """Versi ultralytics (penanda gagal hanya berlaku untuk versi yang sama)."""
+        try:
+            import ultralytics
+            return ultralytics.__version__
+        except Exception:
+            return ""
+    
+    def _export_failed(self, path: str) -> bool:
+        """
+        Periksa apakah ekspor/pemuatan model ini pernah gagal dengan versi
+        ultralytics yang sama. Setiap percobaan ulang bisa memicu ekspor lama
+        dan auto-install pip dari ultralytics, jadi hasil gagal diingat.
+        """
+        try:
+            with open(self._failed_marker_path(path), "r", encoding="utf-8") as f:
+                return f.read().strip() == self._ultralytics_version()
+        except OSError:
+            return False
+    
+    def _mark_export_failed(self, path: str):
+        """Simpan penanda gagal untuk model ekspor (lihat _export_failed)."""
+        try:
+            os.makedirs(MODEL_CACHE_FOLDER, exist_ok=True)
+            with open(self._failed_marker_path(path), "w", encoding="utf-8") as f:
+                f.write(self._ultralytics_version())
+        except OSError:
+            pass
+    
+    def _get_openvino_path(self, model_path: str) -> Optional[str]:
+        """
+        Cari atau buat model OpenVINO IR untuk inferensi CPU.
+        Model INT8 yang sudah dikuantisasi (folder {stem}_int8_openvino_model,
+        dibuat terpisah dengan data kalibrasi) dipakai jika ada di samping model
+        atau di cache model pengguna. Jika tidak, model FP diekspor sekali ke
+        cache; ultralytics tetap menangani letterbox dan NMS.
+        
+        Args:
+            model_path: Path to the .pt model file
+            
+        Returns:
+            Path to the OpenVINO model folder, or None if OpenVINO is unavailable
+        """
+        try:
+            import openvino
+        except ImportError:
+            return None
+        
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        int8_dir = f"{stem}_int8_openvino_model"
+        for folder in (os.path.dirname(os.path.abspath(model_path)), MODEL_CACHE_FOLDER):
+            int8_path = os.path.join(folder, int8_dir)
+            if os.path.isdir(int8_path) and not self._export_failed(int8_path):
+                return int8_path
+        
+        ov_path = os.path.join(MODEL_CACHE_FOLDER, f"{stem}-cpu{INFERENCE_IMGSZ}_openvino_model")
+        if self._export_failed(ov_path):
+            return None
+        if os.path.isdir(ov_path):
+            return ov_path
+        
+        try:
+            import shutil
+            from ultralytics import YOLO
+            
+            # Ekspor dari salinan di cache (lihat _get_engine_path)
+            os.makedirs(MODEL_CACHE_FOLDER, exist_ok=True)
+            source_path = os.path.join(MODEL_CACHE_FOLDER, os.path.basename(model_path))
+            if not os.path.exists(source_path):
+                shutil.copy2(model_path, source_path)
+            
+            print(f"Exporting OpenVINO model (one-time): {ov_path}")
+            exported = YOLO(source_path).export(
+                format="openvino", imgsz=INFERENCE_IMGSZ, dynamic=False,
+                device="cpu", verbose=False
+            )
+            if not exported:
+                self._mark_export_failed(ov_path)
+                return None
+            os.replace(str(exported), ov_path)
+            return ov_path
+        except Exception as e:
+            print(f"OpenVINO export failed: {e}")
+            self._mark_export_failed(ov_path)
+            return None
+    
+    def _get_onnx_path(self, model_path: str) -> Optional[str]:
+        """
+        Cari atau buat model ONNX untuk inferensi CPU lewat ONNX Runtime.
+        Diekspor sekali (ukuran input tetap INFERENCE_IMGSZ) ke cache model
+        pengguna lalu dipakai ulang; ultralytics tetap menangani letterbox
+        dan NMS seperti pada model PyTorch.
+        
+        Args:
+            model_path: Path to the .pt model file
+            
+        Returns:
+            Path to the .onnx file, or None if ONNX Runtime is unavailable
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            return None
+        
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        onnx_path = os.path.join(MODEL_CACHE_FOLDER, f"{stem}-cpu{INFERENCE_IMGSZ}.onnx")
+        if self._export_failed(onnx_path):
+            return None
+        if os.path.exists(onnx_path):
+            return onnx_path
+        
+        try:
+            import shutil
+            from ultralytics import YOLO
+            
+            # Ekspor dari salinan di cache (lihat _get_engine_path)
+            os.makedirs(MODEL_CACHE_FOLDER, exist_ok=True)
+            source_path = os.path.join(MODEL_CACHE_FOLDER, os.path.basename(model_path))
+            if not os.path.exists(source_path):
+                shutil.copy2(model_path, source_path)
+            
+            print(f"Exporting ONNX model (one-time): {onnx_path}")
+            exported = YOLO(source_path).export(
+                format="onnx", imgsz=INFERENCE_IMGSZ, dynamic=False,
+                simplify=True, device="cpu", verbose=False
+            )
+            if not exported:
+                self._mark_export_failed(onnx_path)
+                return None
+            os.replace(str(exported), onnx_path)
+            return onnx_path
+        except Exception as e:
+            print(f"ONNX export failed: {e}")
+            self._mark_export_failed(onnx_path)
+            return None
+    
+    def warmup(self, frame_shape: Tuple[int, int, int] = (480, 640, 3), runs: int = 2):
+        """
+        Jalankan beberapa inferensi dummy agar panggilan pertama tidak lambat
+        (alokasi memori, autotuning cuDNN, inisialisasi engine).
+        Tidak mengubah status pelacak.
+        
+        Args:
+            frame_shape: Shape of the dummy frame (H, W, C)
+            runs: Number of warm-up passes
+        """
+        if self._model is None:
+            return
+        
+        dummy = np.zeros(frame_shape, dtype=np.uint8)
+        try:
+            for _ in range(runs):
+                self._model(dummy, verbose=False, conf=self._confidence, half=self._half,
+                            classes=_PERSON_CLASSES)
+        except Exception as e:
+            print(f"Warning: model warm-up failed (non-fatal): {e}")
+        
+        # Kompilasi kernel post-processing (Numba) di sini, bukan di deteksi pertama
+        try:
+            fast_post.warmup()
+        except Exception as e:
+            print(f"Warning: post-processing warm-up failed (non-fatal): {e}")
+    
     def set_inference_scale(self, scale: float):
         """
         Set the inference downscale factor.
@@ -241,7 +762,46 @@ class DetectorService:
         """Get the current skip-frame interval."""
         return self._skip_frames
     
-    def _redraw_detections(self, frame: np.ndarray, detections: List[Dict]) -> np.ndarray:
+    def set_similarity_skip(self, enabled: bool):
+        """
+        Enable/disable skipping YOLO on frames that look unchanged.
+        Disable for setups that must react to very small movements.
+        """
+        self._similarity_skip = enabled
+        self._last_frame_thumb = None
+    
+    def get_similarity_skip(self) -> bool:
+        """Get whether unchanged frames skip inference."""
+        return self._similarity_skip
+    
+    @staticmethod
+    def _frame_thumb(frame: np.ndarray) -> np.ndarray:
+        """
+        Perkecil frame ke thumbnail grayscale (sisi terpanjang FRAME_DIFF_SIZE).
+        INTER_AREA merata-ratakan noise sensor, tetapi orang kecil/jauh tetap
+        mengubah beberapa piksel thumbnail secara nyata.
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape[:2]
+        scale = FRAME_DIFF_SIZE / max(h, w)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    
+    def _frame_unchanged(self, thumb: np.ndarray, now: float) -> bool:
+        """
+        Periksa apakah frame boleh memakai hasil deteksi terakhir: tidak ada
+        piksel thumbnail yang berubah lebih dari FRAME_DIFF_THRESHOLD, dan
+        inferensi terakhir belum lebih dari SIMILARITY_MAX_SKIP_MS yang lalu.
+        """
+        last = self._last_frame_thumb
+        if last is None or last.shape != thumb.shape:
+            return False
+        if (now - self._last_inference_time) * 1000.0 >= SIMILARITY_MAX_SKIP_MS:
+            return False
+        return cv2.norm(thumb, last, cv2.NORM_INF) <= FRAME_DIFF_THRESHOLD
+    
+    def _redraw_detections(self, frame: np.ndarray, detections: List[Dict],
+                           out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Redraw cached detection bounding boxes on a new frame.
         Used for skip-frame mode to avoid re-running YOLO.
@@ -249,35 +809,45 @@ class DetectorService:
         Args:
             frame: Current raw frame
             detections: Cached detection results
+            out: Optional reusable buffer (same shape/dtype as frame) to draw into;
+                 a new array is allocated if omitted or mismatched
             
         Returns:
-            Frame with bounding boxes drawn
+            Frame with bounding boxes drawn (out, when it was used)
         """
-        annotated = frame.copy()
+        if out is not None and out.shape == frame.shape and out.dtype == frame.dtype:
+            np.copyto(out, frame)
+            annotated = out
+        else:
+            annotated = frame.copy()
         for det in detections:
             x1, y1, x2, y2 = det['bbox']
             conf = det['confidence']
             
             cv2.rectangle(annotated, (x1, y1), (x2, y2), DETECTION_BOX_COLOR, 2)
             
-            label = f"Person {conf * 100:.0f}%"
-            label_size, _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            cv2.rectangle(annotated, (x1, y1 - label_size[1] - 10), (x1 + label_size[0], y1), DETECTION_BOX_COLOR, -1)
-            cv2.putText(annotated, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
+            # Label dari sprite pra-render (tanpa getTextSize/rectangle/putText per kotak)
+            _blit_label(annotated, f"Person {conf * 100:.0f}%", x1, y1)
         
         return annotated
 
-    def detect_humans(self, frame: np.ndarray) -> Tuple[np.ndarray, int, List[Dict]]:
+    def detect_humans(self, frame: np.ndarray, annotate: bool = True,
+                      out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int, List[Dict]]:
         """
         Detect humans in a frame and annotate with bounding boxes.
         Supports inference downscaling and skip-frame mode for performance.
         
         Args:
-            frame: Input frame (BGR format from OpenCV)
+            frame: Input frame (BGR format from OpenCV); never modified
+            annotate: Draw boxes on a copy of the frame. Pass False when only
+                      the detections are needed (no full-frame copy or drawing)
+            out: Optional reusable buffer to draw into instead of a new copy
+                 (see _redraw_detections); the caller owns it between frames
             
         Returns:
             Tuple of (annotated_frame, person_count, detections)
-            - annotated_frame: Frame with drawn bounding boxes
+            - annotated_frame: Frame with drawn bounding boxes (the input
+              frame itself when annotate is False)
             - person_count: Number of people detected
             - detections: List of detection dicts with bbox, confidence
         """
@@ -288,18 +858,40 @@ class DetectorService:
         self._frame_counter += 1
         if self._skip_frames > 1 and self._frame_counter % self._skip_frames != 1:
             if self._last_annotated_detections:
-                annotated = self._redraw_detections(frame, self._last_annotated_detections)
+                annotated = frame
+                if annotate:
+                    annotated = self._redraw_detections(frame, self._last_annotated_detections, out=out)
                 return annotated, len(self._last_annotated_detections), self._last_annotated_detections
             # No cached results yet, fall through to run inference
         
+        # Frame tidak berubah (kamera macet / adegan statis): pakai hasil terakhir,
+        # tetapi paksa inferensi berkala agar tidak tertahan selamanya
+        frame_thumb = None
+        if self._similarity_skip:
+            frame_thumb = self._frame_thumb(frame)
+            if self._frame_unchanged(frame_thumb, time.perf_counter()):
+                detections = self._last_annotated_detections
+                annotated = self._redraw_detections(frame, detections, out=out) if (annotate and detections) else frame
+                return annotated, len(detections), detections
+        
         try:
             h, w = frame.shape[:2]
             
-            # Downscale frame for inference if scale < 1.0
-            if self._inference_scale < 1.0:
-                new_w = int(w * self._inference_scale)
-                new_h = int(h * self._inference_scale)
-                inference_frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_AREA)
+            # Downscale frame for inference: never feed more than the model's
+            # input size (INFERENCE_IMGSZ on the longest side) — otherwise
+            # ultralytics would resize the full frame again on every call
+            scale = min(self._inference_scale, INFERENCE_IMGSZ / max(h, w))
+            if scale < 1.0:
+                new_w = max(1, int(w * scale))
+                new_h = max(1, int(h * scale))
+                
+                # Pakai ulang buffer resize selama ukurannya sama (tanpa alokasi per frame)
+                buf_shape = (new_h, new_w) + frame.shape[2:]
+                if self._inference_buf is None or self._inference_buf.shape != buf_shape:
+                    self._inference_buf = np.empty(buf_shape, dtype=frame.dtype)
+                inference_frame = cv2.resize(
+                    frame, (new_w, new_h), dst=self._inference_buf, interpolation=cv2.INTER_AREA
+                )
                 scale_x = w / new_w
                 scale_y = h / new_h
             else:
@@ -307,91 +899,98 @@ class DetectorService:
                 scale_x = 1.0
                 scale_y = 1.0
             
-            # Run YOLO inference
-            results = self._model(inference_frame, verbose=False, conf=self._confidence)
+            # Run YOLO inference. Predictor ultralytics dibuat sekali dan dipakai ulang;
+            # classes membatasi NMS ke orang saja, jadi kotak class lain tidak
+            # pernah diproses NMS atau disalin ke CPU
+            results = self._model(
+                inference_frame, verbose=False, conf=self._confidence, half=self._half,
+                classes=_PERSON_CLASSES
+            )
             
             detections = []
-            annotated_frame = frame.copy()
-            current_time = time.time()
+            current_time = time.perf_counter()
+            
+            # Pelacak dari frame sebelumnya
+            tracker_ids = self._tracker_ids
+            tracker_boxes = self._tracker_boxes
+            tracker_confs = self._tracker_confs
+            tracker_updates = self._tracker_updates
             
-            # Daftar sementara untuk kecocokan frame saat ini
-            current_trackers = {}
+            # Pelacak untuk frame saat ini
+            new_ids: List[int] = []
+            new_boxes: List[Tuple[float, float, float, float]] = []
+            new_confs: List[float] = []
+            new_updates: List[float] = []
             
             for result in results:
                 boxes = result.boxes
-                if boxes is None:
-                    continue
+                if boxes is None or len(boxes) == 0:
+                    continue  # Adegan kosong: tidak ada transfer tensor/IoU
                 
-                for box in boxes:
-                    cls_id = int(box.cls[0])
-                    
-                    # Filter hanya untuk class person
-                    if cls_id != PERSON_CLASS_ID:
-                        continue
-                        
-                    # Extract bbox and raw confidence
-                    # Scale bbox back to original resolution if downscaled
-                    bx1, by1, bx2, by2 = map(float, box.xyxy[0])
-                    x1 = int(bx1 * scale_x)
-                    y1 = int(by1 * scale_y)
-                    x2 = int(bx2 * scale_x)
-                    y2 = int(by2 * scale_y)
-                    raw_conf = float(box.conf[0])
-                    current_bbox = (x1, y1, x2, y2)
-                    
-                    # Pelacakan sederhana: temukan pelacak ada yang paling cocok melalui IoU
-                    best_match_id = None
-                    max_iou = 0.5  # batas IoU untuk pencocokan
-                    
-                    for tid, data in self._trackers.items():
-                        iou = self._calculate_iou(current_bbox, data['bbox'])
-                        if iou > max_iou:
-                            max_iou = iou
-                            best_match_id = tid
+                # Satu transfer tensor -> NumPy per hasil, bukan per kotak
+                confs = boxes.conf.cpu().numpy()
+                
+                # Filter hanya untuk class person, lalu skalakan bbox kembali
+                # ke resolusi asli jika diperkecil (Numba jika tersedia)
+                person_boxes, keep = scale_and_filter(
+                    boxes.xyxy.cpu().numpy(), confs, boxes.cls.cpu().numpy(),
+                    PERSON_CLASS_ID, self._confidence, scale_x, scale_y, w, h
+                )
+                
+                if len(person_boxes) == 0:
+                    continue  # Tidak ada orang setelah filter class/kepercayaan
+                
+                # Pelacakan sederhana: IoU semua deteksi x semua pelacak sekaligus,
+                # lalu pasangan satu-ke-satu dengan IoU tertinggi lebih dulu
+                if tracker_ids:
+                    iou = self._iou_matrix(person_boxes, tracker_boxes)
+                    matches = self._greedy_match(iou, TRACKER_IOU_THRESHOLD)
+                    # Haluskan bbox menggunakan Exponential Moving Average (EMA) terhadap
+                    # pelacak pasangannya, untuk semua deteksi sekaligus (dipakai jika cocok)
+                    paired_cols = [0 if col is None else col for col in matches]
+                    smoothed = (
+                        tracker_boxes[paired_cols] * (1 - BOX_SMOOTHING_FACTOR)
+                        + person_boxes * BOX_SMOOTHING_FACTOR
+                    ).tolist()
+                else:
+                    matches = [None] * len(person_boxes)
+                    smoothed = [None] * len(person_boxes)
+                
+                for current_bbox, idx, match_col, smoothed_bbox in zip(
+                    person_boxes.tolist(), keep.tolist(), matches, smoothed
+                ):
+                    cls_id = PERSON_CLASS_ID
+                    raw_conf = float(confs[idx])
                     
                     # Tentukan deteksi stabil dan haluskan bbox
-                    if best_match_id is not None:
+                    if match_col is not None:
                         # Objek yang ada ditemukan
-                        tracker = self._trackers[best_match_id]
+                        track_id = tracker_ids[match_col]
                         
                         # Perbarui deteksi hanya jika interval berlalu
-                        if current_time - tracker['last_update'] > CONFIDENCE_UPDATE_INTERVAL:
+                        if current_time - tracker_updates[match_col] > CONFIDENCE_UPDATE_INTERVAL:
                             display_conf = raw_conf
                             last_update = current_time
                         else:
-                            display_conf = tracker['conf']
-                            last_update = tracker['last_update']
+                            display_conf = tracker_confs[match_col]
+                            last_update = tracker_updates[match_col]
                         
-                        # Haluskan bbox menggunakan Exponential Moving Average (EMA)
-                        old_x1, old_y1, old_x2, old_y2 = tracker['bbox']
-                        curr_x1, curr_y1, curr_x2, curr_y2 = current_bbox
-                        
-                        smooth_x1 = old_x1 * (1 - BOX_SMOOTHING_FACTOR) + curr_x1 * BOX_SMOOTHING_FACTOR
-                        smooth_y1 = old_y1 * (1 - BOX_SMOOTHING_FACTOR) + curr_y1 * BOX_SMOOTHING_FACTOR
-                        smooth_x2 = old_x2 * (1 - BOX_SMOOTHING_FACTOR) + curr_x2 * BOX_SMOOTHING_FACTOR
-                        smooth_y2 = old_y2 * (1 - BOX_SMOOTHING_FACTOR) + curr_y2 * BOX_SMOOTHING_FACTOR
-                        
-                        final_bbox = (smooth_x1, smooth_y1, smooth_x2, smooth_y2)
-                            
-                        # Perbarui pelacak
-                        current_trackers[best_match_id] = {
-                            'conf': display_conf,
-                            'last_update': last_update,
-                            'bbox': final_bbox
-                        }
+                        final_bbox = tuple(smoothed_bbox)
                     else:
                         # Objek baru terdeteksi - gunakan nilai mentah
                         self._next_track_id += 1
+                        track_id = self._next_track_id
                         display_conf = raw_conf
+                        last_update = current_time
                         final_bbox = tuple(map(float, current_bbox)) # Simpan sebagai float untuk penghalusan
-                        
-                        current_trackers[self._next_track_id] = {
-                            'conf': display_conf,
-                            'last_update': current_time,
-                            'bbox': final_bbox
-                        }
                     
-                    # Konversi bbox yang dihaluskan ke int untuk menggambar
+                    # Perbarui pelacak (setiap pelacak dipasangkan paling banyak sekali)
+                    new_ids.append(track_id)
+                    new_boxes.append(final_bbox)
+                    new_confs.append(display_conf)
+                    new_updates.append(last_update)
+                    
+                    # Konversi bbox yang dihaluskan ke int (koordinat piksel)
                     draw_x1, draw_y1, draw_x2, draw_y2 = map(int, final_bbox)
                     
                     detections.append({
@@ -399,43 +998,21 @@ class DetectorService:
                         'confidence': display_conf,
                         'class_id': cls_id
                     })
-                    
-                    # Gambar kotak pembatas
-                    cv2.rectangle(
-                        annotated_frame, 
-                        (draw_x1, draw_y1), (draw_x2, draw_y2), 
-                        DETECTION_BOX_COLOR, 
-                        2
-                    )
-                    
-                    # Gambar label dengan deteksi yang distabilkan
-                    label = f"Person {display_conf * 100:.0f}%"
-                    label_size, _ = cv2.getTextSize(
-                        label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2
-                    )
-                    
-                    # Latar belakang label
-                    cv2.rectangle(
-                        annotated_frame,
-                        (draw_x1, draw_y1 - label_size[1] - 10),
-                        (draw_x1 + label_size[0], draw_y1),
-                        DETECTION_BOX_COLOR,
-                        -1
-                    )
-                    
-                    # Teks label
-                    cv2.putText(
-                        annotated_frame, label,
-                        (draw_x1, draw_y1 - 5),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                        (0, 0, 0), 2
-                    )
             
             # Perbarui daftar pelacak (hapus objek yang hilang)
-            self._trackers = current_trackers
+            self._tracker_ids = new_ids
+            self._tracker_boxes = (
+                np.array(new_boxes, dtype=np.float64) if new_boxes else _NO_TRACKER_BOXES
+            )
+            self._tracker_confs = new_confs
+            self._tracker_updates = new_updates
             self._last_detections = detections
             self._last_annotated_detections = detections  # Cache for skip-frame redraw
+            self._last_frame_thumb = frame_thumb
+            self._last_inference_time = current_time
             
+            # Tanpa orang: kembalikan frame apa adanya (tanpa salinan)
+            annotated_frame = self._redraw_detections(frame, detections, out=out) if (annotate and detections) else frame
             return annotated_frame, len(detections), detections
             
         except Exception as e:
@@ -449,38 +1026,57 @@ class DetectorService:
     def set_confidence(self, confidence: float):
         """Tetapkan ambang kepercayaan deteksi (0.1 hingga 1.0)"""
         self._confidence = max(0.1, min(confidence, 1.0))
+        self._last_frame_thumb = None
 
-    def _calculate_iou(self, box1: Tuple[float, float, float, float], box2: Tuple[float, float, float, float]) -> float:
+    @staticmethod
+    def _greedy_match(iou: np.ndarray, threshold: float) -> List[Optional[int]]:
         """
-        Hitung Intersection over Union (IoU) antara dua kotak pembatas.
+        Pasangkan deteksi dengan pelacak satu-ke-satu, IoU tertinggi lebih dulu.
+        Pasangan dengan IoU <= threshold tidak dipakai.
         
         Args:
-            box1: (x1, y1, x2, y2)
-            box2: (x1, y1, x2, y2)
+            iou: (N, M) IoU matrix, detections x trackers
+            threshold: Minimum IoU (exclusive) for a pair
             
         Returns:
-            IoU value between 0.0 and 1.0
+            Per detection, the matched tracker column or None
         """
-        x1_min, y1_min, x1_max, y1_max = box1
-        x2_min, y2_min, x2_max, y2_max = box2
+        matches: List[Optional[int]] = [None] * iou.shape[0]
+        rows, cols = np.nonzero(iou > threshold)
+        if len(rows) == 0:
+            return matches
         
-        # Hitung koordinat persimpangan
-        xi_min = max(x1_min, x2_min)
-        yi_min = max(y1_min, y2_min)
-        xi_max = min(x1_max, x2_max)
-        yi_max = min(y1_max, y2_max)
+        used_cols = set()
+        order = np.argsort(-iou[rows, cols], kind="stable")
+        for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+            if matches[row] is None and col not in used_cols:
+                matches[row] = col
+                used_cols.add(col)
+        return matches
+    
+    @staticmethod
+    def _iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """
+        Hitung Intersection over Union (IoU) untuk setiap pasangan kotak.
+        
+        Args:
+            boxes_a: (N, 4) boxes as (x1, y1, x2, y2)
+            boxes_b: (M, 4) boxes as (x1, y1, x2, y2)
+            
+        Returns:
+            (N, M) IoU values between 0.0 and 1.0
+        """
+        a = np.asarray(boxes_a, dtype=np.float64)[:, None, :]
+        b = np.asarray(boxes_b, dtype=np.float64)[None, :, :]
         
         # Hitung area persimpangan
-        inter_width = max(0, xi_max - xi_min)
-        inter_height = max(0, yi_max - yi_min)
-        inter_area = inter_width * inter_height
+        inter_w = np.maximum(0.0, np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]))
+        inter_h = np.maximum(0.0, np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]))
+        inter_area = inter_w * inter_h
         
         # Hitung area penyatuan
-        box1_area = (x1_max - x1_min) * (y1_max - y1_min)
-        box2_area = (x2_max - x2_min) * (y2_max - y2_min)
-        union_area = box1_area + box2_area - inter_area
+        area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+        area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+        union_area = area_a + area_b - inter_area
         
-        if union_area == 0:
-            return 0.0
-            
-        return inter_area / union_area
+        return np.divide(inter_area, union_area, out=np.zeros_like(inter_area), where=union_area != 0)
@@ -0,0 +1,124 @@
+"""
+Layanan Inferensi - Menjalankan deteksi YOLO di thread terpisah.
+Hanya frame terbaru yang diproses: frame yang datang saat inferensi masih
+berjalan menggantikan frame tertunda sebelumnya (frame basi dibuang).
+Frame diterima langsung dari thread kamera (on_frame), tidak lewat thread GUI.
+"""
+
+import time
+import numpy as np
+from typing import Optional
+from PyQt5.QtCore import QThread, QMutex, QMutexLocker, QWaitCondition, pyqtSignal
+
+
+class InferenceService(QThread):
+    """
+    Thread inferensi dengan kebijakan "frame terbaru menang".
+    Latensi tampilan tetap mendekati satu kali waktu inferensi dan memori
+    tetap terbatas meskipun deteksi lebih lambat dari kamera.
+    """
+
+    # Sinyal: (person_count, detections) dari frame yang baru diproses
+    detection_ready = pyqtSignal(int, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._mutex = QMutex()
+        self._frame_available = QWaitCondition()
+        self._pending_frame: Optional[np.ndarray] = None
+        self._detector = None
+        self._running = False
+        
+        # Diatur dari thread GUI, dibaca di thread kamera (on_frame)
+        self._enabled = False
+        self._detection_interval = 0.0
+        self._last_submit_time = 0.0
+
+    def set_detector(self, detector_service):
+        """
+        Tetapkan DetectorService yang dipakai untuk frame berikutnya.
+
+        Args:
+            detector_service: DetectorService instance (or None to pause detection)
+        """
+        with QMutexLocker(self._mutex):
+            self._detector = detector_service
+
+    def set_enabled(self, enabled: bool):
+        """
+        Aktifkan/nonaktifkan penerimaan frame dari on_frame.
+        Saat dinonaktifkan, frame tertunda juga dibuang.
+        """
+        with QMutexLocker(self._mutex):
+            self._enabled = enabled
+            self._last_submit_time = 0.0
+            if not enabled:
+                self._pending_frame = None
+    
+    def set_target_fps(self, fps: int):
+        """
+        Atur laju deteksi maksimum untuk frame dari on_frame.
+        
+        Args:
+            fps: Detections per second (<= 0 means every frame)
+        """
+        with QMutexLocker(self._mutex):
+            self._detection_interval = 1.0 / fps if fps > 0 else 0.0
+    
+    def on_frame(self, frame: np.ndarray):
+        """
+        Slot untuk VideoService.frame_ready (hubungkan dengan Qt.DirectConnection).
+        Berjalan di thread kamera, jadi frame tidak menunggu event loop GUI.
+        Frame dibatasi sesuai target FPS; hanya frame terbaru yang disimpan.
+        """
+        now = time.perf_counter()
+        with QMutexLocker(self._mutex):
+            if not self._enabled or self._detector is None:
+                return
+            if (now - self._last_submit_time) < self._detection_interval:
+                return
+            self._last_submit_time = now
+            self._pending_frame = frame
+            self._frame_available.wakeOne()
+    
+    def start_service(self):
+        """Mulai thread inferensi (idle sampai ada frame)."""
+        if self.isRunning():
+            return
+        self._running = True
+        # Prioritas di atas thread GUI agar deteksi tidak tertahan saat UI sibuk
+        self.start(QThread.HighPriority)
+
+    def stop_service(self):
+        """Hentikan thread inferensi setelah frame yang sedang diproses selesai."""
+        with QMutexLocker(self._mutex):
+            self._running = False
+            self._pending_frame = None
+            self._frame_available.wakeAll()
+
+        if self.isRunning():
+            if not self.wait(3000):
+                print("Warning: Inference thread not responding")
+
+    def run(self):
+        """Loop inferensi - berjalan di thread terpisah"""
+        while True:
+            self._mutex.lock()
+            while self._running and self._pending_frame is None:
+                self._frame_available.wait(self._mutex)
+
+            if not self._running:
+                self._mutex.unlock()
+                break
+
+            frame = self._pending_frame
+            self._pending_frame = None
+            detector = self._detector
+            self._mutex.unlock()
+
+            if detector is None:
+                continue
+
+            # Hanya hasil deteksi yang dipakai; kotak digambar ulang oleh thread GUI
+            _, person_count, detections = detector.detect_humans(frame, annotate=False)
+            self.detection_ready.emit(person_count, detections)
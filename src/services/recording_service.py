@@ -1,16 +1,102 @@
 """
 Layanan Perekaman - Menangani perekaman video dan tangkapan layar.
 Menyimpan file output ke folder output yang dapat dikonfigurasi pengguna.
+Encoding video berjalan di thread latar belakang; jika ffmpeg dengan encoder
+H.264 hardware (NVENC, Quick Sync, atau AMF) tersedia, frame di-encode oleh
+media engine GPU lewat pipe.
 """
 
 import os
 import time
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Callable
 
-from utils.constants import DEFAULT_OUTPUT_FOLDER, RECORDING_FPS, RECORDING_CODEC
+from utils.constants import (
+    DEFAULT_OUTPUT_FOLDER, RECORDING_FPS, RECORDING_CODEC,
+    RECORDING_QUEUE_SIZE, RECORDING_HW_BITRATE
+)
+
+# Encoder hardware ffmpeg dalam urutan preferensi, dengan opsi latensi rendah
+_HW_ENCODERS = [
+    ("h264_nvenc", ["-preset", "p4", "-tune", "ll"]),        # NVIDIA
+    ("h264_qsv", ["-preset", "veryfast"]),                   # Intel Quick Sync
+    ("h264_amf", ["-usage", "lowlatency", "-quality", "speed"]),  # AMD
+]
+
+# Hasil deteksi encoder hardware (False = belum selesai diperiksa, None = tidak ada).
+# Pemeriksaan dimulai sekali, saat perekaman pertama, di thread latar belakang
+_hw_encoder = False
+_hw_probe_started = False
+_hw_encoder_lock = threading.Lock()
+
+# Jangan munculkan jendela konsol untuk ffmpeg di aplikasi --windowed (Windows)
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def _encoder_works(encoder: str) -> bool:
+    """
+    Encode beberapa frame uji dengan encoder. Daftar "-encoders" hanya
+    menunjukkan encoder yang dikompilasi, bukan bahwa GPU-nya ada.
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error",
+             "-f", "lavfi", "-i", "color=black:s=256x256:d=0.2",
+             "-c:v", encoder, "-f", "null", "-"],
+            capture_output=True, timeout=10, creationflags=_NO_WINDOW
+        )
+        return result.returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def _find_hw_encoder() -> Optional[tuple]:
+    """
+    Kembalikan encoder H.264 hardware yang sudah terdeteksi, tanpa menunggu.
+    Panggilan pertama memulai pemeriksaan di thread latar belakang; selama
+    belum selesai hasilnya None, jadi perekaman memakai OpenCV VideoWriter.
+
+    Returns:
+        (encoder name, extra ffmpeg options), or None to use OpenCV VideoWriter
+    """
+    global _hw_probe_started
+    with _hw_encoder_lock:
+        if not _hw_probe_started:
+            _hw_probe_started = True
+            threading.Thread(target=_probe_hw_encoder, name="EncoderProbe", daemon=True).start()
+    encoder = _hw_encoder
+    return None if encoder is False else encoder
+
+
+def _probe_hw_encoder():
+    """Jalankan _detect_hw_encoder dan simpan hasilnya (thread latar belakang)."""
+    global _hw_encoder
+    _hw_encoder = _detect_hw_encoder()
+
+
+def _detect_hw_encoder() -> Optional[tuple]:
+    """Periksa encoder di _HW_ENCODERS (lihat _find_hw_encoder)."""
+    if shutil.which("ffmpeg"):
+        try:
+            result = subprocess.run(
+                ["ffmpeg", "-hide_banner", "-encoders"],
+                capture_output=True, text=True, timeout=5,
+                creationflags=_NO_WINDOW
+            )
+            compiled = result.stdout
+        except (OSError, subprocess.SubprocessError):
+            compiled = ""
+        for encoder, options in _HW_ENCODERS:
+            if encoder in compiled and _encoder_works(encoder):
+                return (encoder, options)
+    return None
 
 
 class RecordingService:
@@ -22,12 +108,21 @@ class RecordingService:
     def __init__(self, output_folder: str = DEFAULT_OUTPUT_FOLDER):
         self._output_folder = output_folder
         self._writer: Optional[cv2.VideoWriter] = None
+        self._ffmpeg: Optional[subprocess.Popen] = None
+        self._encoder_backend = ""  # Encoder perekaman aktif/terakhir (diagnostik)
+        self._on_error: Optional[Callable[[str], None]] = None
+        self._frame_queue: Optional[queue.Queue] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._dropped_frames = 0
         self._is_recording = False
         self._current_file = ""
         self._rec_start_time = 0.0
         self._frames_written = 0
         self._last_frame = None
 
+        # Screenshot ditulis di thread latar belakang (satu worker = urutan tetap)
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ScreenshotWriter")
+
         # Pastikan folder output ada
         os.makedirs(self._output_folder, exist_ok=True)
 
@@ -53,13 +148,16 @@ class RecordingService:
     # Perekaman Video
     # -------------------------------------------------------------------------
 
-    def start_recording(self, width: int, height: int) -> str:
+    def start_recording(self, width: int, height: int,
+                        on_error: Optional[Callable[[str], None]] = None) -> str:
         """
         Mulai merekam video ke file .mp4.
 
         Args:
             width: Frame width in pixels
             height: Frame height in pixels
+            on_error: Optional callback(error) called from the encoder thread
+                      if encoding fails mid-recording
 
         Returns:
             Path to the output file being written
@@ -72,21 +170,106 @@ class RecordingService:
         filename = f"recording_{timestamp}.mp4"
         filepath = os.path.join(self._output_folder, filename)
 
-        # Buat VideoWriter dengan codec dan FPS yang dikonfigurasi
-        fourcc = cv2.VideoWriter_fourcc(*RECORDING_CODEC)
-        self._writer = cv2.VideoWriter(filepath, fourcc, RECORDING_FPS, (width, height))
-
-        if not self._writer.isOpened():
-            self._writer = None
-            raise RuntimeError(f"Failed to create video writer for: {filepath}")
+        # Utamakan encoder hardware (ffmpeg) jika sudah terdeteksi, fallback ke
+        # VideoWriter (termasuk selama pemeriksaan encoder masih berjalan)
+        hw_encoder = _find_hw_encoder()
+        if hw_encoder is not None:
+            self._ffmpeg = self._open_ffmpeg(filepath, width, height, *hw_encoder)
+            if self._ffmpeg is not None:
+                self._encoder_backend = hw_encoder[0]
+
+        if self._ffmpeg is None:
+            self._encoder_backend = f"opencv-{RECORDING_CODEC}"
+            # Buat VideoWriter dengan codec dan FPS yang dikonfigurasi
+            fourcc = cv2.VideoWriter_fourcc(*RECORDING_CODEC)
+            self._writer = cv2.VideoWriter(filepath, fourcc, RECORDING_FPS, (width, height))
+
+            if not self._writer.isOpened():
+                self._writer = None
+                raise RuntimeError(f"Failed to create video writer for: {filepath}")
+
+        # Encoding di thread latar belakang; write_frame hanya memasukkan ke antrean
+        self._on_error = on_error
+        self._frame_queue = queue.Queue(maxsize=RECORDING_QUEUE_SIZE)
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, args=(self._frame_queue,),
+            name="RecordingWriter", daemon=True
+        )
+        self._writer_thread.start()
 
         self._is_recording = True
         self._current_file = filepath
-        self._rec_start_time = time.time()
+        self._rec_start_time = time.perf_counter()
         self._frames_written = 0
+        self._dropped_frames = 0
         self._last_frame = None
         return filepath
 
+    def _open_ffmpeg(self, filepath: str, width: int, height: int,
+                     encoder: str, options: list) -> Optional[subprocess.Popen]:
+        """
+        Jalankan ffmpeg yang menerima frame BGR mentah dari stdin
+        dan meng-encode-nya dengan encoder hardware.
+
+        Args:
+            filepath: Output .mp4 path
+            width: Frame width in pixels
+            height: Frame height in pixels
+            encoder: ffmpeg encoder name (e.g. 'h264_nvenc')
+            options: Extra encoder options
+
+        Returns:
+            Popen process, or None if ffmpeg could not be started
+        """
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(RECORDING_FPS),
+            "-i", "-",
+            "-c:v", encoder, *options,
+            "-b:v", RECORDING_HW_BITRATE, "-pix_fmt", "yuv420p",
+            filepath,
+        ]
+        try:
+            return subprocess.Popen(
+                cmd, stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                creationflags=_NO_WINDOW
+            )
+        except OSError as e:
+            print(f"Warning: ffmpeg failed to start, using OpenCV writer: {e}")
+            return None
+
+    def _writer_loop(self, frame_queue: queue.Queue):
+        """Loop encoder - berjalan di thread latar belakang sampai menerima None."""
+        while True:
+            frame = frame_queue.get()
+            if frame is None:
+                break
+            try:
+                if self._ffmpeg is not None:
+                    self._ffmpeg.stdin.write(np.ascontiguousarray(frame).data)
+                elif self._writer is not None:
+                    self._writer.write(frame)
+            except (OSError, ValueError) as e:
+                # ffmpeg berhenti (mis. encoder gagal di tengah jalan); laporkan,
+                # lalu buang sisa frame sampai stop_recording mengirim None
+                error = f"Recording encoder ({self._encoder_backend}) stopped: {e}"
+                if self._on_error is not None:
+                    self._on_error(error)
+                else:
+                    print(f"Warning: {error}")
+                while frame_queue.get() is not None:
+                    pass
+                break
+
+    def _enqueue_frame(self, frame: np.ndarray):
+        """Masukkan frame ke antrean encoder tanpa memblokir (dibuang jika penuh)."""
+        try:
+            self._frame_queue.put_nowait(frame)
+        except queue.Full:
+            self._dropped_frames += 1
+
     def write_frame(self, frame: np.ndarray):
         """
         Tulis satu frame ke perekaman aktif.
@@ -96,10 +279,10 @@ class RecordingService:
         Args:
             frame: BGR frame from OpenCV (same format as camera output)
         """
-        if not self._is_recording or self._writer is None:
+        if not self._is_recording or self._frame_queue is None:
             return
 
-        now = time.time()
+        now = time.perf_counter()
         elapsed = now - self._rec_start_time
         expected_frame = int(elapsed * RECORDING_FPS)
 
@@ -112,11 +295,11 @@ class RecordingService:
         gap = min(expected_frame - self._frames_written - 1, int(RECORDING_FPS * 2))
         if gap > 0 and self._last_frame is not None:
             for _ in range(gap):
-                self._writer.write(self._last_frame)
+                self._enqueue_frame(self._last_frame)
                 self._frames_written += 1
 
         # Write current frame
-        self._writer.write(frame)
+        self._enqueue_frame(frame)
         self._frames_written += 1
         self._last_frame = frame
 
@@ -129,32 +312,60 @@ class RecordingService:
         """
         saved_file = self._current_file
 
+        # Tunggu encoder menghabiskan antrean sebelum file ditutup
+        if self._writer_thread is not None:
+            self._frame_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+            self._frame_queue = None
+
+        if self._ffmpeg is not None:
+            try:
+                self._ffmpeg.stdin.close()
+            except OSError:
+                pass
+            self._ffmpeg.wait()
+            self._ffmpeg = None
+
         if self._writer is not None:
             self._writer.release()
             self._writer = None
 
+        if self._dropped_frames:
+            print(f"Warning: {self._dropped_frames} frames dropped (encoder too slow)")
+
         self._is_recording = False
         self._current_file = ""
         self._last_frame = None
+        self._on_error = None
         return saved_file
 
     def is_recording(self) -> bool:
         """Periksa apakah perekaman sedang aktif."""
         return self._is_recording
 
+    def get_encoder_backend(self) -> str:
+        """Kembalikan encoder perekaman aktif/terakhir (mis. 'h264_nvenc', 'opencv-mp4v')."""
+        return self._encoder_backend
+
     # -------------------------------------------------------------------------
     # Tangkapan Layar
     # -------------------------------------------------------------------------
 
-    def capture_screenshot(self, frame: np.ndarray) -> str:
+    def capture_screenshot(self, frame: np.ndarray,
+                           on_done: Optional[Callable[[str, str], None]] = None) -> str:
         """
         Simpan frame saat ini sebagai screenshot PNG.
+        Encoding PNG dan penulisan file berjalan di thread latar belakang;
+        frame disalin lebih dulu sehingga pemanggil bebas memakai ulang buffernya.
 
         Args:
             frame: BGR frame from OpenCV
+            on_done: Optional callback(filepath, error) called from the writer
+                     thread when the file is written; error is "" on success
 
         Returns:
-            Path to the saved screenshot file
+            Path the screenshot will be written to
         """
         if frame is None:
             raise ValueError("No frame available to capture")
@@ -164,12 +375,27 @@ class RecordingService:
         filename = f"capture_{timestamp}.png"
         filepath = os.path.join(self._output_folder, filename)
 
-        success = cv2.imwrite(filepath, frame)
-        if not success:
-            raise RuntimeError(f"Gagal menyimpan screenshot ke: {filepath}")
+        self._io_pool.submit(self._write_screenshot, filepath, frame.copy(), on_done)
         return filepath
 
+    @staticmethod
+    def _write_screenshot(filepath: str, frame: np.ndarray,
+                          on_done: Optional[Callable[[str, str], None]]):
+        """Tulis PNG (berjalan di thread latar belakang)."""
+        try:
+            # Pengaturan PNG bawaan OpenCV (level 1, strategi Z_RLE) adalah yang
+            # tercepat; menyetel IMWRITE_PNG_COMPRESSION justru beralih ke
+            # Z_DEFAULT_STRATEGY yang lebih lambat
+            success = cv2.imwrite(filepath, frame)
+            error = "" if success else f"Gagal menyimpan screenshot ke: {filepath}"
+        except cv2.error as e:
+            error = str(e)
+        if on_done is not None:
+            on_done(filepath, error)
+
     def cleanup(self):
         """Lepaskan sumber daya aktif apa pun."""
         if self._is_recording:
             self.stop_recording()
+        # Selesaikan screenshot yang masih antre sebelum keluar
+        self._io_pool.shutdown(wait=True)
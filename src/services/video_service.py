@@ -1,6 +1,8 @@
 """
 Layanan Video - Menangani penangkapan video dari kamera di thread terpisah.
 Memancarkan frame melalui sinyal PyQt untuk pemrosesan dan tampilan.
+Untuk thread GUI, hanya frame terbaru yang disimpan (slot tunggal) dan diambil
+oleh timer tampilan, sehingga laju tampilan terpisah dari laju kamera.
 """
 
 import cv2
@@ -19,18 +21,23 @@ class VideoService(QThread):
     """
     
     # Sinyal untuk komunikasi asinkron dengan thread utama
-    frame_ready = pyqtSignal(np.ndarray)  # Memancarkan frame kamera mentah
+    frame_ready = pyqtSignal(np.ndarray)  # Memancarkan frame kamera mentah (setiap frame)
     error_occurred = pyqtSignal(str)       # Memancarkan pesan kesalahan
     capture_started = pyqtSignal()         # Memancarkan saat penangkapan dimulai
+    released = pyqtSignal()                # Memancarkan setelah kamera dilepaskan (stop_capture)
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self._camera_index = 0
         self._running = False
         self._capture: Optional[cv2.VideoCapture] = None
-        self._mutex = QMutex()
         self._target_fps = DEFAULT_CAPTURE_FPS
         self._requested_resolution = None  # (width, height) atau None
+        
+        # Slot frame terbaru untuk thread GUI (lihat take_latest_frame). Mutex hanya
+        # melindungi tukar-ambil slot (beberapa ns), bukan pembacaan kamera
+        self._latest_mutex = QMutex()
+        self._latest_frame: Optional[np.ndarray] = None
     
     def _open_camera(self, index: int) -> Optional[cv2.VideoCapture]:
         """
@@ -118,6 +125,9 @@ class VideoService(QThread):
         
         if camera_index is not None:
             self._camera_index = camera_index
+        
+        with QMutexLocker(self._latest_mutex):
+            self._latest_frame = None
             
         self._running = True
         self.start()  # Mulai QThread
@@ -141,6 +151,8 @@ class VideoService(QThread):
             except Exception:
                 pass
             self._capture = None
+        
+        self.released.emit()
     
     def run(self):
         """Loop penangkapan utama - berjalan di thread terpisah"""
@@ -174,16 +186,21 @@ class VideoService(QThread):
         consecutive_failures = 0
         max_failures = 30
         
+        # Hanya thread ini yang membaca kamera; stop_capture melepasnya setelah
+        # thread selesai, jadi pembacaan tidak perlu dikunci
+        capture = self._capture
         while self._running:
-            # Akses kamera aman thread
-            with QMutexLocker(self._mutex):
-                if self._capture is None or not self._capture.isOpened():
-                    break
-                ret, frame = self._capture.read()
+            if not capture.isOpened():
+                break
+            ret, frame = capture.read()
             
             if ret and frame is not None:
                 consecutive_failures = 0
                 self.frame_ready.emit(frame)
+                
+                # Timpa slot terbaru (frame yang belum ditampilkan dibuang, bukan diantre)
+                with QMutexLocker(self._latest_mutex):
+                    self._latest_frame = frame
             else:
                 consecutive_failures += 1
                 if consecutive_failures >= max_failures:
@@ -197,6 +214,18 @@ class VideoService(QThread):
             self._capture.release()
             self._capture = None
     
+    def take_latest_frame(self) -> Optional[np.ndarray]:
+        """
+        Ambil frame terbaru dan kosongkan slotnya (dipanggil dari thread GUI).
+        
+        Returns:
+            Latest BGR frame, or None if no new frame since the last call
+        """
+        with QMutexLocker(self._latest_mutex):
+            frame = self._latest_frame
+            self._latest_frame = None
+        return frame
+    
     def is_running(self) -> bool:
         """Periksa apakah penangkapan sedang berjalan"""
         return self._running
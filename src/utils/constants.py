@@ -4,6 +4,7 @@ Konfigurasi pusat untuk pengaturan jendela, parameter deteksi, dan model YOLO.
 """
 
 import os
+from enum import IntEnum
 
 # =============================================================================
 # Window Settings
@@ -11,12 +12,25 @@ import os
 WINDOW_TITLE = "Poltekad - Elkasista"
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
+COMPACT_LAYOUT_WIDTH = 900      # Below this width, buttons show icons only
+COMPACT_LAYOUT_HYSTERESIS = 20  # +/- px band to avoid flapping while resizing
+COMPACT_LAYOUT_DEBOUNCE_MS = 50 # Delay before applying a layout switch
 
 # =============================================================================
 # Pengaturan Deteksi
 # =============================================================================
 CONFIDENCE_THRESHOLD = 0.5  # Kepercayaan minimum untuk deteksi (0.0 - 1.0)
 PERSON_CLASS_ID = 0         # ID class COCO untuk orang
+INFERENCE_IMGSZ = 640       # Ukuran input model (sisi terpanjang, piksel)
+
+# =============================================================================
+# Jenis Model (varian ukuran) - dipakai untuk perbandingan integer, bukan string
+# =============================================================================
+class ModelKind(IntEnum):
+    """Varian ukuran model YOLO"""
+    NANO = 0    # Cepat - cocok untuk CPU
+    SMALL = 1   # Seimbang - lebih berat di CPU
+
 
 # =============================================================================
 # Model YOLO yang Tersedia
@@ -25,33 +39,39 @@ PERSON_CLASS_ID = 0         # ID class COCO untuk orang
 YOLO_MODELS = {
     # YOLOv8 (2023 - stabil, diuji secara luas)
     "YOLOv8n - Fast": {
+        "kind": ModelKind.NANO,
         "file": "yolov8n.pt",
         "description": "Model Nano - Tercepat, bagus untuk real-time di CPU",
         "size": "6.3 MB"
     },
     "YOLOv8s - Balanced": {
+        "kind": ModelKind.SMALL,
         "file": "yolov8s.pt",
         "description": "Model Kecil - Kecepatan dan akurasi seimbang",
         "size": "22.5 MB"
     },
     # YOLOv11 (2024 - arsitektur yang ditingkatkan)
     "YOLOv11n - Fast": {
+        "kind": ModelKind.NANO,
         "file": "yolo11n.pt",
         "description": "Nano v11 - Lebih cepat dengan akurasi lebih baik dari v8",
         "size": "5.4 MB"
     },
     "YOLOv11s - Balanced": {
+        "kind": ModelKind.SMALL,
         "file": "yolo11s.pt",
         "description": "Kecil v11 - Keseimbangan hebat untuk deteksi real-time",
         "size": "18.4 MB"
     },
     # YOLO12 (2025 - mutakhir)
     "YOLO12n - Fast": {
+        "kind": ModelKind.NANO,
         "file": "yolo12n.pt",
         "description": "Nano v12 - Terbaru, tercepat dengan mekanisme atensi",
         "size": "5.6 MB"
     },
     "YOLO12s - Balanced": {
+        "kind": ModelKind.SMALL,
         "file": "yolo12s.pt",
         "description": "Kecil v12 - Keseimbangan terbaik dengan atensi area",
         "size": "19.2 MB"
@@ -60,6 +80,14 @@ YOLO_MODELS = {
 
 DEFAULT_MODEL = "YOLOv8n - Fast"
 
+# Model tidak dibundel di executable — diunduh sekali ke cache pengguna
+MODEL_CACHE_FOLDER = os.path.join(
+    os.environ.get("LOCALAPPDATA", os.path.join(os.path.expanduser("~"), ".cache")),
+    "HumanDetectionApp", "models"
+)
+MODEL_DOWNLOAD_URL = "https://github.com/ultralytics/assets/releases/download/v8.3.0/{file}"
+MODEL_DOWNLOAD_TIMEOUT = 30  # Detik tanpa data sebelum unduhan model dibatalkan
+
 # =============================================================================
 # Warna Anotasi Deteksi (format BGR untuk OpenCV)
 # =============================================================================
@@ -69,6 +97,8 @@ DETECTION_BOX_COLOR = (0, 255, 0)  # Kotak pembatas hijau
 # Pengaturan Kamera
 # =============================================================================
 MAX_CAMERA_INDEX = 10  # Indeks kamera maksimum untuk dipindai
+CAMERA_SCAN_MAX_MISSES = 2  # Hentikan pemindaian setelah indeks kosong berturut-turut ini
+CAMERA_FIRST_FRAME_TIMEOUT = 1.5  # Detik menunggu frame pertama (webcam USB/UVC bisa lambat)
 
 # =============================================================================
 # Perekaman & Tangkapan
@@ -76,6 +106,8 @@ MAX_CAMERA_INDEX = 10  # Indeks kamera maksimum untuk dipindai
 DEFAULT_OUTPUT_FOLDER = os.path.join(os.path.expanduser("~"), "Documents", "HumanDetectionApp")
 RECORDING_FPS = 20.0        # Output video framerate
 RECORDING_CODEC = "mp4v"    # FourCC codec for .mp4 output
+RECORDING_QUEUE_SIZE = 8    # Max frames waiting for the background encoder
+RECORDING_HW_BITRATE = "8M" # Bitrate for the ffmpeg hardware H.264 encoders
 
 # =============================================================================
 # Performance Settings
@@ -83,6 +115,8 @@ RECORDING_CODEC = "mp4v"    # FourCC codec for .mp4 output
 DEFAULT_CAPTURE_FPS = 30    # Default camera capture FPS
 MIN_FPS = 1                 # Minimum allowed FPS
 MAX_FPS = 60                # Maximum allowed FPS
+DISPLAY_FPS = 30            # Video widget repaint rate (independent of capture)
+DISPLAY_OPENCL_SCALING = False  # Scale preview via OpenCL UMat (opt-in; allocates per frame)
 
 # Named FPS presets for the settings UI
 FPS_PRESETS = {
@@ -97,3 +131,9 @@ INFERENCE_SCALE = 1.0
 
 # Skip-frame detection: run YOLO every Nth frame (1 = every frame)
 SKIP_FRAMES_DEFAULT = 1
+
+# Skip YOLO when a frame looks the same as the last inferred one (opt-in)
+SIMILARITY_SKIP_DEFAULT = False
+FRAME_DIFF_SIZE = 96            # Longest side of the grayscale thumbnail compared
+FRAME_DIFF_THRESHOLD = 12       # Max per-pixel change (0-255) still treated as unchanged
+SIMILARITY_MAX_SKIP_MS = 1000   # Force an inference at least this often
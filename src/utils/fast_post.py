@@ -0,0 +1,98 @@
+"""
+Post-processing Cepat - Operasi numerik pada hasil deteksi YOLO.
+Dikompilasi dengan Numba (JIT) jika terpasang; tanpa Numba memakai NumPy.
+Numba baru diimpor saat pertama dipakai (lihat warmup), bukan saat modul dimuat.
+"""
+
+import sys
+import importlib.util
+import numpy as np
+
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# Cache hasil kompilasi di samping sumber; tidak bisa di executable PyInstaller
+# (hanya ada .pyc, Numba tidak menemukan lokasi cache)
+_JIT_CACHE = not getattr(sys, "frozen", False)
+
+
+def _scale_and_filter_numpy(boxes, confs, cls, class_id, conf_thr, scale_x, scale_y, w, h):
+    """Versi NumPy (tanpa Numba)."""
+    keep = np.flatnonzero((cls == class_id) & (confs >= conf_thr)).astype(np.int32)
+    scaled = boxes[keep] * np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+    out = scaled.astype(np.int32)  # truncation, sama seperti int()
+    np.clip(out[:, 0::2], 0, w - 1, out=out[:, 0::2])
+    np.clip(out[:, 1::2], 0, h - 1, out=out[:, 1::2])
+    return out, keep
+
+
+def _scale_and_filter_loop(boxes, confs, cls, class_id, conf_thr, scale_x, scale_y, w, h):
+    """Versi loop untuk dikompilasi Numba (tanpa array sementara)."""
+    n = boxes.shape[0]
+    keep = np.empty(n, dtype=np.int32)
+    count = 0
+    for i in range(n):
+        if int(cls[i]) == class_id and confs[i] >= conf_thr:
+            keep[count] = i
+            count += 1
+
+    out = np.empty((count, 4), dtype=np.int32)
+    for j in range(count):
+        i = keep[j]
+        out[j, 0] = min(max(int(boxes[i, 0] * scale_x), 0), w - 1)
+        out[j, 1] = min(max(int(boxes[i, 1] * scale_y), 0), h - 1)
+        out[j, 2] = min(max(int(boxes[i, 2] * scale_x), 0), w - 1)
+        out[j, 3] = min(max(int(boxes[i, 3] * scale_y), 0), h - 1)
+    return out, keep[:count]
+
+
+_scale_and_filter_impl = None
+
+
+def _get_impl():
+    """Pilih implementasi saat pertama dipakai (impor & kompilasi Numba di sini)."""
+    global _scale_and_filter_impl
+    if _scale_and_filter_impl is None:
+        impl = _scale_and_filter_numpy
+        if NUMBA_AVAILABLE:
+            try:
+                from numba import njit
+                # nogil: kernel dipanggil dari thread inferensi, jangan tahan GIL dari thread GUI
+                impl = njit(cache=_JIT_CACHE, fastmath=True, nogil=True)(_scale_and_filter_loop)
+            except Exception as e:
+                print(f"Warning: Numba unavailable, using NumPy post-processing: {e}")
+        _scale_and_filter_impl = impl
+    return _scale_and_filter_impl
+
+
+def warmup():
+    """Impor Numba dan kompilasi kernel sekarang (panggil dari thread latar belakang)."""
+    scale_and_filter(np.zeros((1, 4), np.float32), np.ones(1, np.float32),
+                     np.zeros(1, np.float32), 0, 0.5, 1.0, 1.0, 2, 2)
+
+
+def scale_and_filter(boxes: np.ndarray, confs: np.ndarray, cls: np.ndarray,
+                     class_id: int, conf_thr: float,
+                     scale_x: float, scale_y: float, w: int, h: int):
+    """
+    Saring kotak per class dan kepercayaan, skalakan ke resolusi frame,
+    lalu potong ke batas frame.
+
+    Args:
+        boxes: (N, 4) xyxy boxes in inference-frame pixels
+        confs: (N,) confidences
+        cls: (N,) class ids
+        class_id: Class to keep (e.g. PERSON_CLASS_ID)
+        conf_thr: Minimum confidence to keep
+        scale_x, scale_y: Factors from inference frame to display frame
+        w, h: Display frame size used for clipping
+
+    Returns:
+        Tuple of (int32 (M, 4) boxes, int32 (M,) indices into the input)
+    """
+    return _get_impl()(
+        np.ascontiguousarray(boxes, dtype=np.float32),
+        np.ascontiguousarray(confs, dtype=np.float32),
+        np.ascontiguousarray(cls, dtype=np.float32),
+        int(class_id), float(conf_thr),
+        float(scale_x), float(scale_y), int(w), int(h)
+    )
@@ -3,6 +3,9 @@ Gaya dan Tema UI
 Definisi stylesheet terpusat untuk aplikasi.
 """
 
+from functools import lru_cache
+
+
 def get_main_theme() -> str:
     """Dapatkan stylesheet tema aplikasi global."""
     return """
@@ -55,6 +58,7 @@ def get_combo_style() -> str:
         }
     """
 
+@lru_cache(maxsize=32)
 def get_button_style(color: str, hover_color: str) -> str:
     """Hasilkan stylesheet untuk tombol tindakan standar."""
     return f"""
@@ -79,6 +83,7 @@ def get_button_style(color: str, hover_color: str) -> str:
         }}
     """
 
+@lru_cache(maxsize=32)
 def get_icon_button_style(color: str, hover_color: str) -> str:
     """Hasilkan stylesheet untuk tombol hanya icon."""
     return f"""
@@ -121,6 +126,21 @@ def get_control_bar_style() -> str:
         }
     """
 
+def get_context_menu_style() -> str:
+    """Dapatkan stylesheet untuk menu konteks (klik kanan)."""
+    return """
+        QMenu {
+            background-color: #1a1a2e;
+            border: 1px solid #2d2d44;
+            color: #ffffff;
+            padding: 4px;
+        }
+        QMenu::item:selected {
+            background-color: #00d9ff;
+            color: #000000;
+        }
+    """
+
 def get_status_bar_style() -> str:
     """Dapatkan stylesheet untuk bilah status."""
     return "color: #8b8b8b; font-size: 11px;"
@@ -5,10 +5,13 @@ Menangani rendering frame, penskalaan rasio aspek, dan pesan status.
 
 import cv2
 import numpy as np
+from typing import Optional
 from PyQt5.QtWidgets import QLabel
 from PyQt5.QtCore import Qt, QSize
 from PyQt5.QtGui import QImage, QPixmap
 
+from utils.constants import DISPLAY_OPENCL_SCALING
+
 
 class VideoWidget(QLabel):
     """
@@ -26,6 +29,16 @@ class VideoWidget(QLabel):
         self._is_active = False      # True when displaying video frames
         self._fast_scaling = True    # Use fast (nearest-neighbor) scaling by default
         
+        # Buffer BGR persisten (seukuran tampilan) + QImage yang membungkusnya;
+        # dibuat ulang hanya jika ukuran target berubah
+        self._scaled_buf = None
+        self._q_image = None
+        
+        # Penskalaan lewat OpenCL (T-API) hanya jika diaktifkan eksplisit:
+        # unggah/unduh UMat mengalokasikan array dan QImage baru setiap frame.
+        # Diperiksa saat frame pertama agar mengikuti pengaturan OpenCL saat startup
+        self._use_opencl: Optional[bool] = None if DISPLAY_OPENCL_SCALING else False
+        
         self.show_no_camera()
     
     # =========================================================================
@@ -115,19 +128,31 @@ class VideoWidget(QLabel):
                 }
             """)
         
-        # Konversi BGR (OpenCV) → RGB (Qt) untuk warna yang benar
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_frame.shape
-        bytes_per_line = ch * w
+        # Ukuran target yang pas dengan widget (mempertahankan rasio aspek)
+        h, w = frame.shape[:2]
+        scale = min(self.width() / w, self.height() / h)
+        target_w = max(1, int(w * scale))
+        target_h = max(1, int(h * scale))
+        interpolation = cv2.INTER_NEAREST if self._fast_scaling else cv2.INTER_LINEAR
         
-        # Buat gambar Qt dan skalakan agar pas dengan widget (mempertahankan rasio aspek)
-        q_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        transform_mode = Qt.FastTransformation if self._fast_scaling else Qt.SmoothTransformation
-        scaled_pixmap = QPixmap.fromImage(q_image).scaled(
-            self.size(), Qt.KeepAspectRatio, transform_mode
-        )
+        # Qt 5.14+ membaca BGR langsung (Format_BGR888): tidak perlu konversi
+        # BGR → RGB, cukup skalakan frame ke ukuran tampilan
+        if self._use_opencl is None:
+            self._use_opencl = cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        if self._use_opencl:
+            scaled = cv2.resize(cv2.UMat(frame), (target_w, target_h), interpolation=interpolation).get()
+            q_image = QImage(scaled.data, target_w, target_h, scaled.strides[0], QImage.Format_BGR888)
+        else:
+            if self._scaled_buf is None or self._scaled_buf.shape[:2] != (target_h, target_w):
+                self._scaled_buf = np.empty((target_h, target_w, 3), dtype=np.uint8)
+                self._q_image = QImage(
+                    self._scaled_buf.data, target_w, target_h, 3 * target_w, QImage.Format_BGR888
+                )
+            cv2.resize(frame, (target_w, target_h), dst=self._scaled_buf, interpolation=interpolation)
+            q_image = self._q_image
         
-        self.setPixmap(scaled_pixmap)
+        # QPixmap menyalin data, jadi buffer aman ditimpa pada frame berikutnya
+        self.setPixmap(QPixmap.fromImage(q_image))
     
     def clear_display(self):
         """Hapus video dan tampilkan placeholder tanpa kamera"""